@@ -1,25 +1,84 @@
+import argparse
+import dataclasses
+import hashlib
 import json
+import os
+import sys
+from functools import lru_cache
+from importlib import metadata
 from pathlib import Path
 
+import zplgrid
 from zplgrid import LabelTarget, compile_zpl
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
-def main() -> None:
-    template = json.loads(Path('qr_left_text_right.template.json').read_text(encoding='utf-8'))
-
-    zpl = compile_zpl(
-        template,
-        target=LabelTarget(width_mm=74.0, height_mm=26.0, dpi=203),
-        variables={
-            'asset_id': 'A-001-2025',
-            'title': 'Cable Box 1',
-            'subtitle': 'USB-C / PD 100W',
-        },
-        debug=True,
+
+@lru_cache(maxsize=32)
+def _load_template(path: str, mtime_ns: int) -> dict:
+    return _loads(Path(path).read_bytes())
+
+
+_CACHE_ENV_FLAGS = ('LABELARY_ENABLE', 'ZPLGRID_ENABLE_LABELARY_TEMPLATES', 'ZPLGRID_ENABLE_IMAGE_URL')
+
+
+def _zplgrid_version() -> str:
+    try:
+        version = metadata.version('zplgrid')
+    except metadata.PackageNotFoundError:
+        version = 'src'
+    digest = hashlib.blake2b(digest_size=16)
+    for path in sorted(Path(zplgrid.__file__).parent.glob('*.py')):
+        digest.update(path.read_bytes())
+    return f'{version}-{digest.hexdigest()}'
+
+
+def _cache_key(template: dict, target: LabelTarget, variables: dict) -> str:
+    env = {name: os.getenv(name, '') for name in _CACHE_ENV_FLAGS}
+    payload = json.dumps(
+        [_zplgrid_version(), env, template, dataclasses.asdict(target), variables],
+        sort_keys=True,
+        separators=(',', ':'),
     )
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compile the example template to out.zpl.')
+    parser.add_argument('--cache-dir', type=Path, help='Reuse compiled ZPL stored in this directory.')
+    args = parser.parse_args()
+
+    template_path = Path('qr_left_text_right.template.json')
+    template = _load_template(str(template_path), template_path.stat().st_mtime_ns)
+    target = LabelTarget(width_mm=74.0, height_mm=26.0, dpi=203)
+    variables = {
+        'asset_id': 'A-001-2025',
+        'title': 'Cable Box 1',
+        'subtitle': 'USB-C / PD 100W',
+    }
+
+    cache_path = None
+    zpl = None
+    if args.cache_dir is not None:
+        cache_path = args.cache_dir / f'{_cache_key(template, target, variables)}.zpl'
+        if cache_path.is_file():
+            zpl = cache_path.read_text(encoding='utf-8')
+
+    if zpl is None:
+        zpl = compile_zpl(template, target=target, variables=variables, debug=True)
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(zpl, encoding='utf-8')
 
-    Path('out.zpl').write_text(zpl, encoding='utf-8')
-    print(zpl)
+    data = zpl.encode('utf-8')
+    Path('out.zpl').write_bytes(data)
+    sys.stdout.flush()
+    sys.stdout.buffer.writelines((data, b'\n'))
+    sys.stdout.buffer.flush()
 
 
 if __name__ == '__main__':
@@ -2,11 +2,23 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from zplgrid import LabelTarget, compile_zpl
-from zplgrid.labelary import lint_labelary_zpl
+if TYPE_CHECKING:
+    import requests
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+_DPMM = {203: 8, 300: 12, 600: 24}
+_IN_PER_MM = 1.0 / 25.4
 
 DEFAULT_TEMPLATE = {
     "schema_version": 1,
@@ -30,21 +42,14 @@ DEFAULT_TEMPLATE = {
     },
 }
 
+@lru_cache(maxsize=32)
+def _load_template(path: str, mtime_ns: int) -> dict:
+    return _loads(Path(path).read_bytes())
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Compile template and lint via Labelary.")
-    parser.add_argument("template", nargs="?", help="Path to template JSON file.")
-    parser.add_argument("--width-mm", type=float, default=74.0)
-    parser.add_argument("--height-mm", type=float, default=26.0)
-    parser.add_argument("--dpi", type=int, default=203)
-    parser.add_argument("--no-compact", action="store_true", help="Send ZPL with newlines to Labelary.")
-    args = parser.parse_args()
 
-    if args.template:
-        template_path = Path(args.template)
-        template = json.loads(template_path.read_text(encoding="utf-8"))
-    else:
-        template = DEFAULT_TEMPLATE
+def _lint_one(template: dict, args: argparse.Namespace, session: requests.Session) -> str:
+    from zplgrid import LabelTarget, compile_zpl
+    from zplgrid.labelary import lint_labelary_zpl
 
     target = LabelTarget(width_mm=args.width_mm, height_mm=args.height_mm, dpi=args.dpi)
     zpl = compile_zpl(template, target=target, variables={}, debug=False)
@@ -52,24 +57,53 @@ def main() -> int:
 
     warnings = lint_labelary_zpl(
         zpl_for_lint,
-        dpmm=int(round(args.dpi / 25.4)),
-        label_width_in=args.width_mm / 25.4,
-        label_height_in=args.height_mm / 25.4,
+        dpmm=_DPMM.get(args.dpi) or int(round(args.dpi * _IN_PER_MM)),
+        label_width_in=args.width_mm * _IN_PER_MM,
+        label_height_in=args.height_mm * _IN_PER_MM,
         compact=not args.no_compact,
+        session=session,
     )
 
-    print("ZPL:")
-    print(zpl)
-    print("Warnings:")
+    lines = ["ZPL:", zpl] if args.print_zpl else []
+    lines.append("Warnings:")
     if not warnings:
-        print("  (none)")
-        return 0
+        lines.append("  (none)")
     for warning in warnings:
         cmd = warning.command or "-"
         param = str(warning.param_index) if warning.param_index is not None else "-"
-        print(
+        lines.append(
             f"- idx={warning.byte_index} size={warning.byte_size} cmd={cmd} param={param}: {warning.message}"
         )
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compile template and lint via Labelary.")
+    parser.add_argument("templates", nargs="*", help="Paths to template JSON files.")
+    parser.add_argument("--width-mm", type=float, default=74.0)
+    parser.add_argument("--height-mm", type=float, default=26.0)
+    parser.add_argument("--dpi", type=int, default=203)
+    parser.add_argument("--no-compact", action="store_true", help="Send ZPL with newlines to Labelary.")
+    parser.add_argument("--print-zpl", action="store_true", help="Print the compiled ZPL before the warnings.")
+    args = parser.parse_args()
+
+    import requests
+
+    if args.templates:
+        templates = []
+        for raw_path in args.templates:
+            template_path = Path(raw_path)
+            templates.append((raw_path, _load_template(str(template_path), template_path.stat().st_mtime_ns)))
+    else:
+        templates = [(None, DEFAULT_TEMPLATE)]
+
+    with requests.Session() as session:
+        if len(templates) == 1:
+            sys.stdout.write(_lint_one(templates[0][1], args, session))
+            return 0
+        for name, template in templates:
+            sys.stdout.write(f"== {name}\n{_lint_one(template, args, session)}")
+            sys.stdout.flush()
     return 0
 
 
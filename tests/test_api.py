@@ -0,0 +1,246 @@
+import base64
+import io
+import json
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from zplgrid import api, labelary, printers_config, templates_store
+
+_ROOT = Path(__file__).resolve().parents[1]
+_TARGET = {'width_mm': 74.0, 'height_mm': 26.0, 'dpi': 203}
+
+
+def _template() -> dict:
+    return json.loads((_ROOT / 'examples' / 'qr_left_text_right.template.json').read_text(encoding='utf-8'))
+
+
+def _item(title: str) -> dict:
+    return {
+        'template': _template(),
+        'target': _TARGET,
+        'variables': {'asset_id': 'A-001-2025', 'title': title, 'subtitle': 'USB-C / PD 100W'},
+    }
+
+
+def _png(label: str) -> bytes:
+    info = PngInfo()
+    info.add_text('label', label)
+    out = io.BytesIO()
+    Image.new('L', (8, 8), 255).save(out, format='PNG', pnginfo=info)
+    return out.getvalue()
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setenv('ZPLGRID_ENABLE_LABELARY_API', '1')
+    monkeypatch.setattr(templates_store, '_TEMPLATES_DIR', tmp_path / 'templates')
+    client = TestClient(api.app)
+    client.post('/v1/cache/clear')
+    yield client
+    client.post('/v1/cache/clear')
+
+
+@pytest.fixture
+def labelary_calls(monkeypatch):
+    calls = []
+
+    def render(zpl, **kwargs):
+        calls.append(zpl)
+        if 'Broken' in zpl:
+            raise RuntimeError('Labelary returned HTTP 500')
+        if 'Offline' in zpl:
+            raise requests.ConnectionError('Max retries exceeded')
+        return _png(zpl)
+
+    monkeypatch.setattr(labelary, 'render_labelary_png_bytes', render)
+    return calls
+
+
+def _decoded_labels(response) -> list[str]:
+    labels = []
+    for encoded in response.json()['png_base64']:
+        with Image.open(io.BytesIO(base64.b64decode(encoded))) as image:
+            labels.append(image.text['label'])
+    return labels
+
+
+def test_batch_render_dedupes_and_keeps_order(client, labelary_calls) -> None:
+    items = [_item('First'), _item('Second'), _item('First'), _item('Third')]
+    response = client.post('/v1/renders/png/batch', json={'items': items})
+
+    assert response.status_code == 200
+    labels = _decoded_labels(response)
+    assert len(labels) == 4
+    assert len(labelary_calls) == 3
+    assert labels[0] == labels[2]
+    assert 'First' in labels[0]
+    assert 'Second' in labels[1]
+    assert 'Third' in labels[3]
+
+
+def test_batch_render_reports_failing_compile_item(client, labelary_calls) -> None:
+    bad = _item('Second')
+    bad['variables'] = {}
+    response = client.post('/v1/renders/png/batch', json={'items': [_item('First'), bad]})
+
+    assert response.status_code == 400
+    assert response.json()['detail'].startswith('items[1]:')
+    assert labelary_calls == []
+
+
+def test_batch_render_reports_failing_labelary_item(client, labelary_calls) -> None:
+    response = client.post('/v1/renders/png/batch', json={'items': [_item('First'), _item('Broken')]})
+
+    assert response.status_code == 502
+    assert response.json()['detail'] == 'items[1]: Labelary returned HTTP 500'
+
+
+def test_batch_render_reports_labelary_connection_error(client, labelary_calls) -> None:
+    response = client.post('/v1/renders/png/batch', json={'items': [_item('First'), _item('Offline')]})
+
+    assert response.status_code == 502
+    assert response.json()['detail'] == 'items[1]: Max retries exceeded'
+
+
+def test_batch_render_rejects_empty_batch(client, labelary_calls) -> None:
+    response = client.post('/v1/renders/png/batch', json={'items': []})
+
+    assert response.status_code == 422
+    assert labelary_calls == []
+
+
+def test_batch_render_rejects_oversized_batch(client, labelary_calls) -> None:
+    items = [_item(f'Item {idx}') for idx in range(api._MAX_BATCH_ITEMS + 1)]
+    response = client.post('/v1/renders/png/batch', json={'items': items})
+
+    assert response.status_code == 422
+    assert labelary_calls == []
+
+
+def test_batch_render_cancels_pending_renders_on_failure(client, monkeypatch) -> None:
+    calls = []
+    release = threading.Event()
+
+    def render(zpl, **kwargs):
+        calls.append(zpl)
+        if 'Broken' in zpl:
+            raise RuntimeError('Labelary returned HTTP 500')
+        release.wait(timeout=5)
+        return _png(zpl)
+
+    monkeypatch.setattr(labelary, 'render_labelary_png_bytes', render)
+    items = [_item('Broken')] + [_item(f'Item {idx}') for idx in range(12)]
+    response = client.post('/v1/renders/png/batch', json={'items': items})
+    release.set()
+    api._BATCH_EXECUTOR.submit(lambda: None).result(timeout=5)
+
+    assert response.status_code == 502
+    assert len(calls) <= 1 + api._BATCH_EXECUTOR._max_workers
+
+
+def test_batch_render_requires_labelary_api(client, labelary_calls, monkeypatch) -> None:
+    monkeypatch.setenv('ZPLGRID_ENABLE_LABELARY_API', '0')
+    response = client.post('/v1/renders/png/batch', json={'items': [_item('First')]})
+
+    assert response.status_code == 403
+    assert labelary_calls == []
+
+
+def test_template_preview_etag(client, labelary_calls, monkeypatch) -> None:
+    monkeypatch.setenv('ZPLGRID_ENABLE_LABELARY_TEMPLATES', '1')
+    item = _item('Preview')
+    response = client.post(
+        '/v1/templates',
+        json={
+            'name': 'Preview test',
+            'template': item['template'],
+            'sample_data': item['variables'],
+            'preview_target': _TARGET,
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()['preview_available'] is True
+    template_id = response.json()['id']
+
+    first = client.get(f'/v1/templates/{template_id}/preview')
+    assert first.status_code == 200
+    assert first.headers['content-type'] == 'image/png'
+    etag = first.headers['etag']
+
+    cached = client.get(f'/v1/templates/{template_id}/preview', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.headers['etag'] == etag
+    assert cached.content == b''
+
+    weak = client.get(f'/v1/templates/{template_id}/preview', headers={'If-None-Match': f'W/{etag}'})
+    assert weak.status_code == 304
+
+    stale = client.get(f'/v1/templates/{template_id}/preview', headers={'If-None-Match': '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == first.content
+
+
+def test_printers_etag(client, monkeypatch, tmp_path) -> None:
+    config = printers_config.load_printers_config(_ROOT / 'configs' / 'printers.yml')
+    printer = dict(config['printers'][0])
+    monkeypatch.setattr(printers_config, '_PRINTERS_CONFIG_PATH', tmp_path / 'printers.yml')
+    monkeypatch.setattr(api.app.state, 'printers_config', config, raising=False)
+
+    first = client.get('/v1/printers')
+    assert first.status_code == 200
+    etag = first.headers['etag']
+
+    cached = client.get('/v1/printers', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.headers['etag'] == etag
+
+    wildcard = client.get('/v1/printers', headers={'If-None-Match': '*'})
+    assert wildcard.status_code == 304
+
+    printer['name'] = 'Renamed printer'
+    assert client.put(f"/v1/printers/{printer['id']}", json=printer).status_code == 200
+
+    changed = client.get('/v1/printers', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['etag'] != etag
+    assert changed.json()['printers'][0]['name'] == 'Renamed printer'
+
+
+def _printer_config() -> dict:
+    return {
+        'config_version': 1,
+        'printers': [
+            {
+                'id': 'lab',
+                'connection': {'protocol': 'raw9100', 'host': '127.0.0.1', 'port': 9100},
+                'media': {'loaded': {'width_mm': 74.0, 'height_mm': 26.0}},
+                'alignment': {'dpi': 203},
+            }
+        ],
+    }
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/v1/printers/lab/prints/zpl', {'zpl': '^XA^XZ', 'return_preview': True}),
+    ('/v1/printers/lab/prints/template', {**_item('Print'), 'return_preview': True}),
+])
+def test_failed_print_cancels_pending_preview(client, monkeypatch, path, body) -> None:
+    pending = Future()
+
+    def send(printer, zpl):
+        raise ConnectionRefusedError('printer offline')
+
+    monkeypatch.setattr(api.app.state, 'printers_config', _printer_config(), raising=False)
+    monkeypatch.setattr(api, '_start_preview', lambda zpl, target: pending)
+    monkeypatch.setattr(api, 'send_raw_zpl', send)
+    response = client.post(path, json=body)
+
+    assert response.status_code == 502
+    assert pending.cancelled()
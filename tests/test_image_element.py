@@ -38,3 +38,99 @@ def test_image_base64_inline_emits_gfa():
     zpl = compile_zpl(template, target=LabelTarget(width_mm=10.0, height_mm=10.0, dpi=203))
     assert '^GFA,8,8,1,FFFFFFFFFFFFFFFF' in zpl
 
+
+def _image_template(img, **element_overrides):
+    buf = io.BytesIO()
+    img.save(buf, format='PNG')
+    b64 = base64.b64encode(buf.getvalue()).decode('ascii')
+    element = {
+        'type': 'image',
+        'source': {'kind': 'base64', 'data': b64},
+        'fit': 'none',
+        'align_h': 'left',
+        'align_v': 'top',
+        'dither': 'none',
+        'threshold': 128,
+    }
+    element.update(element_overrides)
+    return {
+        'schema_version': 1,
+        'name': 'image_rows',
+        'defaults': {
+            'leaf_padding_mm': [0, 0, 0, 0],
+        },
+        'layout': {
+            'kind': 'leaf',
+            'elements': [element],
+        },
+    }
+
+
+def test_image_gfa_pads_partial_row_bytes():
+    img = Image.new('L', (10, 2), color=255)
+    img.paste(0, (0, 0, 5, 2))
+    target = LabelTarget(width_mm=10.0, height_mm=10.0, dpi=203)
+
+    zpl = compile_zpl(_image_template(img), target=target)
+    assert '^GFA,4,4,2,F800F800' in zpl
+
+    zpl = compile_zpl(_image_template(img, invert=True), target=target)
+    assert '^GFA,4,4,2,07C007C0' in zpl
+
+
+def _decode_acs(data, bytes_per_row):
+    row_chars = bytes_per_row * 2
+    rows = []
+    row = ''
+    count = 0
+    for ch in data:
+        if 'G' <= ch <= 'Y':
+            count += ord(ch) - ord('G') + 1
+            continue
+        if 'g' <= ch <= 'z':
+            count += (ord(ch) - ord('g') + 1) * 20
+            continue
+        if ch == ':':
+            rows.append(rows[-1])
+            continue
+        if ch in ',!':
+            row = row.ljust(row_chars, '0' if ch == ',' else 'F')
+        else:
+            row += ch * (count or 1)
+            count = 0
+        if len(row) == row_chars:
+            rows.append(row)
+            row = ''
+    return ''.join(rows)
+
+
+def _gfa_params(zpl):
+    return zpl.split('^GFA,', 1)[1].split('\n', 1)[0].split(',', 3)
+
+
+def test_image_gfa_compression_round_trips():
+    import binascii
+    import zlib
+
+    img = Image.new('L', (64, 24), color=255)
+    img.paste(0, (0, 0, 64, 4))
+    img.paste(0, (8, 10, 40, 20))
+    img.paste(0, (60, 12, 64, 14))
+    target = LabelTarget(width_mm=20.0, height_mm=10.0, dpi=203)
+    template = _image_template(img)
+
+    total, _, bytes_per_row, data = _gfa_params(compile_zpl(template, target=target))
+
+    template['defaults']['render'] = {'graphic_compression': 'acs'}
+    acs = _gfa_params(compile_zpl(template, target=target))
+    assert acs[:3] == [total, total, bytes_per_row]
+    assert len(acs[3]) < len(data)
+    assert _decode_acs(acs[3], int(bytes_per_row)) == data
+
+    template['defaults']['render'] = {'graphic_compression': 'z64'}
+    z64 = _gfa_params(compile_zpl(template, target=target))
+    assert z64[:3] == [total, total, bytes_per_row]
+    _, tag, encoded, crc = z64[3].split(':')
+    assert tag == 'Z64'
+    assert zlib.decompress(base64.b64decode(encoded)).hex().upper() == data
+    assert int(crc, 16) == binascii.crc_hqx(encoded.encode('ascii'), 0)
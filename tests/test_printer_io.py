@@ -0,0 +1,131 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from zplgrid import printer_io
+
+
+class _RecordingSocket:
+    def __init__(self, sent: list) -> None:
+        self.sent = sent
+
+    def __enter__(self) -> '_RecordingSocket':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def settimeout(self, timeout: float) -> None:
+        return None
+
+    def sendall(self, payload: bytes) -> None:
+        self.sent.append(payload)
+
+
+class _FailingSocket:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+    def __enter__(self) -> '_FailingSocket':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def settimeout(self, timeout: float) -> None:
+        return None
+
+    def sendall(self, payload: bytes) -> None:
+        raise self.error
+
+
+def _send_concurrently(monkeypatch, error: BaseException) -> tuple[list, int]:
+    connects = []
+
+    def create_connection(address, timeout=None):
+        connects.append(address)
+        return _FailingSocket(error)
+
+    monkeypatch.setenv('ZPLGRID_PRINT_BATCH_WINDOW_MS', '200')
+    monkeypatch.delenv('ZPLGRID_PRINT_LOCK_DIR', raising=False)
+    monkeypatch.setattr(printer_io.socket, 'create_connection', create_connection)
+
+    printer = {'connection': {'protocol': 'raw9100', 'host': '127.0.0.1', 'port': 9100, 'timeout_ms': 1000}}
+    results: list = [None, None]
+
+    def send(index: int) -> None:
+        try:
+            results[index] = printer_io.send_raw_zpl(printer, f'^XA^FD{index}^FS^XZ')
+        except BaseException as exc:
+            results[index] = exc
+
+    threads = [threading.Thread(target=send, args=(index,)) for index in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results, len(connects)
+
+
+def test_batched_send_reports_socket_error_to_every_sender(monkeypatch) -> None:
+    results, connects = _send_concurrently(monkeypatch, ConnectionResetError('reset by peer'))
+
+    assert connects == 1
+    assert all(isinstance(result, ConnectionResetError) for result in results)
+
+
+def test_batched_send_reports_unexpected_error_to_every_sender(monkeypatch) -> None:
+    results, connects = _send_concurrently(monkeypatch, RuntimeError('boom'))
+
+    assert connects == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_batched_send_follower_times_out_when_leader_is_stuck(monkeypatch) -> None:
+    key = ('127.0.0.1', 9100)
+    stuck = printer_io._PendingBatch()
+    stuck.sending.set()
+    monkeypatch.setenv('ZPLGRID_PRINT_BATCH_WINDOW_MS', '50')
+    monkeypatch.setitem(printer_io._PENDING_BATCHES, key, stuck)
+
+    printer = {'connection': {'protocol': 'raw9100', 'host': '127.0.0.1', 'port': 9100, 'timeout_ms': 100}}
+    with pytest.raises(TimeoutError):
+        printer_io.send_raw_zpl(printer, '^XA^XZ')
+    assert len(stuck.payloads) == 1
+
+
+def test_batched_send_follower_waits_for_leader_held_on_print_lock(monkeypatch, tmp_path) -> None:
+    sent = []
+
+    @contextmanager
+    def slow_lock(path):
+        time.sleep(0.5)
+        yield
+
+    monkeypatch.setenv('ZPLGRID_PRINT_BATCH_WINDOW_MS', '50')
+    monkeypatch.setenv('ZPLGRID_PRINT_LOCK_DIR', str(tmp_path))
+    monkeypatch.setattr(printer_io, 'interprocess_lock', slow_lock)
+    monkeypatch.setattr(printer_io.socket, 'create_connection', lambda address, timeout=None: _RecordingSocket(sent))
+
+    printer = {'connection': {'protocol': 'raw9100', 'host': '127.0.0.1', 'port': 9100, 'timeout_ms': 100}}
+    payloads = ['^XA^FDleader^FS^XZ', '^XA^FDfollower^FS^XZ']
+    results: list = [None, None]
+
+    def send(index: int) -> None:
+        try:
+            results[index] = printer_io.send_raw_zpl(printer, payloads[index])
+        except BaseException as exc:
+            results[index] = exc
+
+    leader = threading.Thread(target=send, args=(0,))
+    leader.start()
+    time.sleep(0.01)
+    follower = threading.Thread(target=send, args=(1,))
+    follower.start()
+    leader.join(timeout=5)
+    follower.join(timeout=5)
+
+    assert results == [len(payloads[0]), len(payloads[1])]
+    assert sent == [payload.encode('utf-8') for payload in payloads]
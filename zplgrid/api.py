@@ -1,20 +1,29 @@
 from __future__ import annotations
 
 import base64
+import gzip
+import hashlib
+import io
 import json
 import os
-from datetime import datetime, timezone
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
 from typing import Any, Mapping, Optional
 
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from starlette.datastructures import Headers, MutableHeaders
 
+from .compiler import clear_compile_caches
 from .exceptions import CompilationError, LayoutError, TemplateRenderError, TemplateValidationError
-from .labelary import render_labelary_png_bytes
 from .macros import MacroContext, build_macro_variables, collect_template_placeholders, now_for_macros
-from .model import DataMatrixElement, LabelTarget, LeafNode, QrElement, SplitNode, Template, TextElement
+from .measure import clear_width_cache
+from .model import DataMatrixElement, ImageElement, LabelTarget, LeafNode, QrElement, SplitNode, Template, TextElement
 from .parser import load_template
 from .printer_io import apply_printer_settings, query_raw_command, send_raw_zpl
 from .printers_config import load_printers_config, save_printers_config
@@ -24,6 +33,8 @@ from .templates_store import load_template_entry, list_templates, save_template_
 
 
 class RenderTarget(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     width_mm: float = Field(..., gt=0)
     height_mm: float = Field(..., gt=0)
     dpi: int = Field(203, gt=0)
@@ -42,9 +53,61 @@ class RenderResponse(BaseModel):
     zpl: str
 
 
+_MAX_BATCH_ITEMS = 50
+
+
+class RenderBatchRequest(BaseModel):
+    items: list[RenderRequest] = Field(..., min_length=1, max_length=_MAX_BATCH_ITEMS)
+
+
+class RenderBatchResponse(BaseModel):
+    png_base64: list[str]
+
+
+_GZIP_CONTENT_TYPES = ('application/json', 'text/')
+
+
+class _TextGZipMiddleware:
+    def __init__(self, app: Any, minimum_size: int = 512) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        if scope['type'] != 'http' or 'gzip' not in Headers(scope=scope).get('accept-encoding', ''):
+            await self.app(scope, receive, send)
+            return
+
+        start: dict[str, Any] = {}
+
+        async def send_compressed(message: dict[str, Any]) -> None:
+            if message['type'] == 'http.response.start':
+                start.update(message)
+                return
+            if message['type'] == 'http.response.body' and start:
+                headers = MutableHeaders(raw=start['headers'])
+                body = message.get('body', b'')
+                if (
+                    not message.get('more_body', False)
+                    and len(body) >= self.minimum_size
+                    and 'content-encoding' not in headers
+                    and headers.get('content-type', '').startswith(_GZIP_CONTENT_TYPES)
+                ):
+                    body = gzip.compress(body, compresslevel=6)
+                    headers['Content-Encoding'] = 'gzip'
+                    headers['Content-Length'] = str(len(body))
+                    headers.add_vary_header('Accept-Encoding')
+                    message = {**message, 'body': body}
+                await send(dict(start))
+                start.clear()
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
 load_dotenv()
 
 app = FastAPI(title="zplgrid API", version="1.0")
+app.add_middleware(_TextGZipMiddleware, minimum_size=512)
 
 _cors_origins_raw = os.getenv('ZPLGRID_CORS_ORIGINS', '')
 _cors_origins = [origin.strip() for origin in _cors_origins_raw.split(',') if origin.strip()]
@@ -71,6 +134,9 @@ def _load_printers_config_on_startup() -> None:
         raise RuntimeError(f'Failed to load printers.yml: {exc}') from exc
 
 
+_TEMPLATE_ERRORS = (TemplateValidationError, TemplateRenderError, CompilationError, LayoutError, ValueError)
+
+
 def _assert_variables_present(template: Template, variables: Mapping[str, Any]) -> None:
     options = RenderOptions(missing_variables="error")
 
@@ -103,6 +169,7 @@ def _labelary_templates_enabled() -> bool:
     return os.getenv('ZPLGRID_ENABLE_LABELARY_TEMPLATES', '') == '1'
 
 
+@lru_cache(maxsize=128)
 def _target_to_labelary_args(target: RenderTarget) -> tuple[int, float, float]:
     dpmm = max(1, int(round(target.dpi / 25.4)))
     label_width_in = target.width_mm / 25.4
@@ -110,38 +177,157 @@ def _target_to_labelary_args(target: RenderTarget) -> tuple[int, float, float]:
     return dpmm, label_width_in, label_height_in
 
 
+_PREVIEW_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='zplgrid-preview')
+_BATCH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='zplgrid-batch')
+_LABELARY_CACHE_DIR = os.getenv('ZPLGRID_LABELARY_CACHE_DIR', '')
+
+
+@lru_cache(maxsize=512)
+def _render_png(zpl: str, dpmm: int, width_in: float, height_in: float) -> bytes:
+    cache_path = _render_cache_path(zpl, dpmm, width_in, height_in)
+    if cache_path is not None:
+        try:
+            return cache_path.read_bytes()
+        except OSError:
+            pass
+    from .labelary import render_labelary_png_bytes
+
+    png = render_labelary_png_bytes(
+        zpl,
+        dpmm=dpmm,
+        label_width_in=width_in,
+        label_height_in=height_in,
+        index=0,
+        timeout_s=30,
+    )
+    if cache_path is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = cache_path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+            temp_path.write_bytes(png)
+            temp_path.replace(cache_path)
+        except OSError:
+            pass
+    return png
+
+
+def _render_cache_path(zpl: str, dpmm: int, width_in: float, height_in: float) -> Optional[Path]:
+    if not _LABELARY_CACHE_DIR:
+        return None
+    digest = hashlib.sha256(f'{dpmm}:{width_in!r}:{height_in!r}:{zpl}'.encode('utf-8')).hexdigest()
+    return Path(_LABELARY_CACHE_DIR) / digest[:2] / f'{digest}.png'
+
+
+_COMPILE_CACHE: dict[tuple[str, RenderTarget, str, bool], str] = {}
+_COMPILE_CACHE_SIZE = 256
+_COMPILE_CACHE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=256)
+def _load_template_cached(template_json: str) -> tuple[Template, frozenset[str]]:
+    template = load_template(template_json)
+    return template, frozenset(collect_template_placeholders(template))
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+
+def _prepare_template(
+    raw_template: dict[str, Any],
+    variables: Mapping[str, Any],
+    *,
+    template_name: Optional[str] = None,
+    printer_id: Optional[str] = None,
+    increment_counters: bool = False,
+    template_json: Optional[str] = None,
+) -> tuple[Template, dict[str, Any]]:
+    template, used_names = _load_template_cached(template_json or _canonical_json(raw_template))
+    if template_name is None and isinstance(raw_template, dict):
+        template_name = str(raw_template.get('name'))
+    macro_vars = build_macro_variables(
+        used_names,
+        existing_variables=variables,
+        context=MacroContext(
+            template_name=template_name,
+            printer_id=printer_id,
+            draft_id=None,
+            now=now_for_macros(),
+            increment_counters=increment_counters,
+        ),
+    )
+    merged = {**macro_vars, **variables}
+    _assert_variables_present(template, merged)
+    return template, merged
+
+
+def _label_target(target: RenderTarget) -> LabelTarget:
+    return LabelTarget(
+        width_mm=target.width_mm,
+        height_mm=target.height_mm,
+        dpi=target.dpi,
+        origin_x_mm=target.origin_x_mm,
+        origin_y_mm=target.origin_y_mm,
+    )
+
+
+def _uses_image_urls(node) -> bool:
+    if isinstance(node, LeafNode):
+        return any(isinstance(element, ImageElement) and element.source.kind == 'url' for element in node.elements)
+    if isinstance(node, SplitNode):
+        return any(_uses_image_urls(child) for child in node.children)
+    return False
+
+
+def _compile_render_request(payload: RenderRequest) -> str:
+    template_json = _canonical_json(payload.template)
+    cache_key = (template_json, payload.target, _canonical_json(payload.variables), payload.debug)
+    cached = _COMPILE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    template, variables = _prepare_template(payload.template, payload.variables, template_json=template_json)
+    zpl = template.compile(target=_label_target(payload.target), variables=variables, debug=payload.debug)
+    if len(variables) == len(payload.variables) and not _uses_image_urls(template.layout):
+        with _COMPILE_CACHE_LOCK:
+            if len(_COMPILE_CACHE) >= _COMPILE_CACHE_SIZE:
+                _COMPILE_CACHE.pop(next(iter(_COMPILE_CACHE)))
+            _COMPILE_CACHE[cache_key] = zpl
+    return zpl
+
+
+def _render_template_preview(template: Template, variables: Mapping[str, Any], preview_target: RenderTarget) -> Optional[bytes]:
+    if not _labelary_templates_enabled():
+        return None
+    zpl = template.compile(target=_label_target(preview_target), variables=variables, debug=False)
+    dpmm, width_in, height_in = _target_to_labelary_args(preview_target)
+    return _render_png(zpl, dpmm, width_in, height_in)
+
+
+def _compact_png(png: bytes) -> bytes:
+    try:
+        from PIL import Image
+
+        with Image.open(io.BytesIO(png)) as image:
+            image.load()
+            if image.mode in ('L', 'RGB', 'P'):
+                colors = image.convert('RGB').getcolors(2)
+                if colors is not None and {color for _, color in colors} <= {(0, 0, 0), (255, 255, 255)}:
+                    image = image.convert('L').convert('1', dither=Image.Dither.NONE)
+            out = io.BytesIO()
+            image.save(out, format='PNG', optimize=True)
+    except Exception:
+        return png
+    compacted = out.getvalue()
+    return compacted if len(compacted) < len(png) else png
+
+
 @app.post("/v1/renders/zpl", response_model=RenderResponse)
 def render_zpl(payload: RenderRequest) -> RenderResponse:
     try:
-        template = load_template(payload.template)
-        used_names = collect_template_placeholders(template)
-        macro_vars = build_macro_variables(
-            used_names,
-            existing_variables=payload.variables,
-            context=MacroContext(
-                template_name=str(payload.template.get('name')) if isinstance(payload.template, dict) else None,
-                printer_id=None,
-                draft_id=None,
-                now=now_for_macros(),
-                increment_counters=False,
-            ),
-        )
-        variables = {**macro_vars, **payload.variables}
-        _assert_variables_present(template, variables)
-        target = LabelTarget(
-            width_mm=payload.target.width_mm,
-            height_mm=payload.target.height_mm,
-            dpi=payload.target.dpi,
-            origin_x_mm=payload.target.origin_x_mm,
-            origin_y_mm=payload.target.origin_y_mm,
-        )
-        zpl = template.compile(target=target, variables=variables, debug=payload.debug)
+        zpl = _compile_render_request(payload)
         return RenderResponse(zpl=zpl)
-    except TemplateValidationError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except TemplateRenderError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except (CompilationError, LayoutError, ValueError) as exc:
+    except _TEMPLATE_ERRORS as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
@@ -150,49 +336,47 @@ def render_png(payload: RenderRequest) -> Response:
     if not _labelary_api_enabled():
         raise HTTPException(status_code=403, detail='Labelary render API is disabled')
     try:
-        template = load_template(payload.template)
-        used_names = collect_template_placeholders(template)
-        macro_vars = build_macro_variables(
-            used_names,
-            existing_variables=payload.variables,
-            context=MacroContext(
-                template_name=str(payload.template.get('name')) if isinstance(payload.template, dict) else None,
-                printer_id=None,
-                draft_id=None,
-                now=now_for_macros(),
-                increment_counters=False,
-            ),
-        )
-        variables = {**macro_vars, **payload.variables}
-        _assert_variables_present(template, variables)
-        target = LabelTarget(
-            width_mm=payload.target.width_mm,
-            height_mm=payload.target.height_mm,
-            dpi=payload.target.dpi,
-            origin_x_mm=payload.target.origin_x_mm,
-            origin_y_mm=payload.target.origin_y_mm,
-        )
-        zpl = template.compile(target=target, variables=variables, debug=payload.debug)
+        zpl = _compile_render_request(payload)
         dpmm, width_in, height_in = _target_to_labelary_args(payload.target)
-        image_bytes = render_labelary_png_bytes(
-            zpl,
-            dpmm=dpmm,
-            label_width_in=width_in,
-            label_height_in=height_in,
-            index=0,
-            timeout_s=30,
-        )
+        image_bytes = _render_png(zpl, dpmm, width_in, height_in)
         return Response(content=image_bytes, media_type="image/png")
-    except TemplateValidationError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except TemplateRenderError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except (CompilationError, LayoutError, ValueError) as exc:
+    except _TEMPLATE_ERRORS as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except RuntimeError as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
 
+@app.post("/v1/renders/png/batch", response_model=RenderBatchResponse)
+def render_png_batch(payload: RenderBatchRequest) -> RenderBatchResponse:
+    if not _labelary_api_enabled():
+        raise HTTPException(status_code=403, detail='Labelary render API is disabled')
+    jobs: list[tuple[str, int, float, float]] = []
+    for idx, item in enumerate(payload.items):
+        try:
+            zpl = _compile_render_request(item)
+        except _TEMPLATE_ERRORS as exc:
+            raise HTTPException(status_code=400, detail=f'items[{idx}]: {exc}') from exc
+        jobs.append((zpl, *_target_to_labelary_args(item.target)))
+
+    from requests import RequestException
+
+    unique_jobs = list(dict.fromkeys(jobs))
+    futures = [_BATCH_EXECUTOR.submit(_render_png, *job) for job in unique_jobs]
+    encoded: dict[tuple[str, int, float, float], str] = {}
+    try:
+        for job, future in zip(unique_jobs, futures):
+            try:
+                image_bytes = future.result()
+            except (RuntimeError, RequestException) as exc:
+                raise HTTPException(status_code=502, detail=f'items[{jobs.index(job)}]: {exc}') from exc
+            encoded[job] = base64.b64encode(image_bytes).decode('ascii')
+    finally:
+        for future in futures:
+            future.cancel()
+    images = [encoded[job] for job in jobs]
+    return RenderBatchResponse(png_base64=images)
+
+
 class PrintZplRequest(BaseModel):
     zpl: str
     return_preview: bool = False
@@ -270,6 +454,24 @@ class TemplateDetailResponse(BaseModel):
     sample_data: dict[str, Any]
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    candidates = {value.strip().removeprefix('W/') for value in header.split(',')}
+    return '*' in candidates or etag in candidates
+
+
+def _printers_config_payload(config: Mapping[str, Any]) -> tuple[bytes, str]:
+    cached = getattr(app.state, 'printers_config_payload', None)
+    if cached is not None and cached[0] is config:
+        return cached[1], cached[2]
+    body = PrintersConfigResponse(**config).model_dump_json().encode('utf-8')
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    app.state.printers_config_payload = (config, body, etag)
+    return body, etag
+
+
 def _get_printer(printer_id: str) -> dict[str, Any]:
     config = getattr(app.state, 'printers_config', None) or load_printers_config()
     app.state.printers_config = config
@@ -315,20 +517,39 @@ def _printer_labelary_args(printer: Mapping[str, Any]) -> tuple[int, float, floa
     return _target_to_labelary_args(target)
 
 
-def _render_preview_or_error(zpl: str, *, dpmm: int, width_in: float, height_in: float, return_preview: bool) -> Optional[str]:
+def _start_preview(zpl: str, target: RenderTarget) -> Optional[Future[bytes]]:
+    if not _labelary_preview_enabled():
+        return None
+    return _PREVIEW_EXECUTOR.submit(_render_png, zpl, *_target_to_labelary_args(target))
+
+
+def _send_or_cancel_preview(printer: Mapping[str, Any], zpl: str, pending: Optional[Future[bytes]]) -> int:
+    try:
+        return send_raw_zpl(printer, zpl)
+    except BaseException:
+        if pending is not None:
+            pending.cancel()
+        raise
+
+
+def _render_preview_or_error(
+    zpl: str,
+    *,
+    dpmm: int,
+    width_in: float,
+    height_in: float,
+    return_preview: bool,
+    pending: Optional[Future[bytes]] = None,
+) -> Optional[str]:
     if not return_preview:
         return None
     if not _labelary_preview_enabled():
         raise HTTPException(status_code=403, detail='Labelary preview is disabled')
     try:
-        image_bytes = render_labelary_png_bytes(
-            zpl,
-            dpmm=dpmm,
-            label_width_in=width_in,
-            label_height_in=height_in,
-            index=0,
-            timeout_s=30,
-        )
+        if pending is not None:
+            image_bytes = pending.result()
+        else:
+            image_bytes = _render_png(zpl, dpmm, width_in, height_in)
     except RuntimeError as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
     return base64.b64encode(image_bytes).decode('ascii')
@@ -380,6 +601,14 @@ def _parse_host_inventory(raw: str) -> dict[str, str]:
     return info
 
 
+_STATUS_QUERIES = {
+    'host_status': ('~HS', _parse_host_status),
+    'host_diagnostic': ('~HD', _parse_host_diagnostic),
+    'host_identification': ('~HI', _parse_host_identification),
+    'host_inventory': ('~HQES', _parse_host_inventory),
+}
+
+
 def _parse_int(value: str) -> Optional[int]:
     try:
         return int(value)
@@ -484,8 +713,14 @@ def print_zpl(printer_id: str, payload: PrintZplRequest) -> PrintResponse:
     printer = _get_printer(printer_id)
     _ensure_printer_enabled(printer)
     zpl_with_settings = apply_printer_settings(payload.zpl, printer)
+    pending_preview = None
+    if payload.return_preview:
+        try:
+            pending_preview = _start_preview(payload.zpl, _printer_target(printer))
+        except HTTPException:
+            pending_preview = None
     try:
-        bytes_sent = send_raw_zpl(printer, zpl_with_settings)
+        bytes_sent = _send_or_cancel_preview(printer, zpl_with_settings, pending_preview)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except OSError as exc:
@@ -498,6 +733,7 @@ def print_zpl(printer_id: str, payload: PrintZplRequest) -> PrintResponse:
         width_in=width_in,
         height_in=height_in,
         return_preview=payload.return_preview,
+        pending=pending_preview,
     )
     return PrintResponse(printer_id=printer_id, bytes_sent=bytes_sent, preview_png_base64=preview)
 
@@ -505,20 +741,7 @@ def print_zpl(printer_id: str, payload: PrintZplRequest) -> PrintResponse:
 @app.post("/v1/drafts", response_model=PrintDraftResponse)
 def create_print_draft(payload: PrintDraftCreateRequest) -> PrintDraftResponse:
     try:
-        template = load_template(payload.template)
-        used_names = collect_template_placeholders(template)
-        macro_vars = build_macro_variables(
-            used_names,
-            existing_variables=payload.variables,
-            context=MacroContext(
-                template_name=str(payload.template.get('name')) if isinstance(payload.template, dict) else None,
-                printer_id=None,
-                draft_id=None,
-                now=now_for_macros(),
-                increment_counters=False,
-            ),
-        )
-        _assert_variables_present(template, {**macro_vars, **payload.variables})
+        _prepare_template(payload.template, payload.variables)
         entry = save_print_draft(
             template=payload.template,
             variables=payload.variables,
@@ -529,11 +752,7 @@ def create_print_draft(payload: PrintDraftCreateRequest) -> PrintDraftResponse:
             draft_id=entry.draft_id,
             expires_at=entry.expires_at.isoformat(),
         )
-    except TemplateValidationError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except TemplateRenderError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except (CompilationError, LayoutError, ValueError) as exc:
+    except _TEMPLATE_ERRORS as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
@@ -562,30 +781,18 @@ def print_template(printer_id: str, payload: PrintTemplateRequest) -> PrintRespo
     printer = _get_printer(printer_id)
     _ensure_printer_enabled(printer)
     try:
-        template = load_template(payload.template)
-        used_names = collect_template_placeholders(template)
-        macro_vars = build_macro_variables(
-            used_names,
-            existing_variables=payload.variables,
-            context=MacroContext(
-                template_name=str(payload.template.get('name')) if isinstance(payload.template, dict) else None,
-                printer_id=printer_id,
-                draft_id=None,
-                now=now_for_macros(),
-                increment_counters=True,
-            ),
+        template, variables = _prepare_template(
+            payload.template,
+            payload.variables,
+            printer_id=printer_id,
+            increment_counters=True,
         )
-        variables = {**macro_vars, **payload.variables}
-        _assert_variables_present(template, variables)
         target = payload.target or _printer_target(printer)
-        zpl = template.compile(target=LabelTarget(**target.model_dump()), variables=variables, debug=payload.debug)
+        zpl = template.compile(target=_label_target(target), variables=variables, debug=payload.debug)
         zpl_with_settings = apply_printer_settings(zpl, printer)
-        bytes_sent = send_raw_zpl(printer, zpl_with_settings)
-    except TemplateValidationError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except TemplateRenderError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except (CompilationError, LayoutError, ValueError) as exc:
+        pending_preview = _start_preview(zpl, target) if payload.return_preview else None
+        bytes_sent = _send_or_cancel_preview(printer, zpl_with_settings, pending_preview)
+    except _TEMPLATE_ERRORS as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except OSError as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
@@ -597,6 +804,7 @@ def print_template(printer_id: str, payload: PrintTemplateRequest) -> PrintRespo
         width_in=width_in,
         height_in=height_in,
         return_preview=payload.return_preview,
+        pending=pending_preview,
     )
     return PrintResponse(printer_id=printer_id, bytes_sent=bytes_sent, preview_png_base64=preview)
 
@@ -607,16 +815,9 @@ def get_printer_status(printer_id: str) -> PrinterStatusResponse:
     _ensure_printer_enabled(printer)
     _ensure_printer_supports_status(printer)
 
-    commands = {
-        'host_status': '~HS',
-        'host_diagnostic': '~HD',
-        'host_identification': '~HI',
-        'host_inventory': '~HQES',
-    }
-
     raw_results: dict[str, str] = {}
     parsed_results: dict[str, Any] = {}
-    for key, cmd in commands.items():
+    for key, (cmd, parse) in _STATUS_QUERIES.items():
         try:
             raw_text = _clean_status_text(query_raw_command(printer, cmd))
         except ValueError as exc:
@@ -625,14 +826,7 @@ def get_printer_status(printer_id: str) -> PrinterStatusResponse:
             raise HTTPException(status_code=502, detail=str(exc)) from exc
 
         raw_results[key] = raw_text
-        if key == 'host_status':
-            parsed_results[key] = _parse_host_status(raw_text)
-        elif key == 'host_diagnostic':
-            parsed_results[key] = _parse_host_diagnostic(raw_text)
-        elif key == 'host_identification':
-            parsed_results[key] = _parse_host_identification(raw_text)
-        elif key == 'host_inventory':
-            parsed_results[key] = _parse_host_inventory(raw_text)
+        parsed_results[key] = parse(raw_text)
 
     normalized_results = _normalize_status_payload(raw_results)
     return PrinterStatusResponse(
@@ -646,40 +840,10 @@ def get_printer_status(printer_id: str) -> PrinterStatusResponse:
 @app.post("/v1/templates", response_model=TemplateDetailResponse)
 def save_template(payload: TemplateSaveRequest) -> TemplateDetailResponse:
     try:
-        template = load_template(payload.template)
-        used_names = collect_template_placeholders(template)
-        macro_vars = build_macro_variables(
-            used_names,
-            existing_variables=payload.sample_data,
-            context=MacroContext(
-                template_name=payload.name,
-                printer_id=None,
-                draft_id=None,
-                now=now_for_macros(),
-                increment_counters=False,
-            ),
-        )
-        variables = {**macro_vars, **payload.sample_data}
-        _assert_variables_present(template, variables)
-        preview_png = None
-        if _labelary_templates_enabled():
-            target = LabelTarget(
-                width_mm=payload.preview_target.width_mm,
-                height_mm=payload.preview_target.height_mm,
-                dpi=payload.preview_target.dpi,
-                origin_x_mm=payload.preview_target.origin_x_mm,
-                origin_y_mm=payload.preview_target.origin_y_mm,
-            )
-            zpl = template.compile(target=target, variables=variables, debug=False)
-            dpmm, width_in, height_in = _target_to_labelary_args(payload.preview_target)
-            preview_png = render_labelary_png_bytes(
-                zpl,
-                dpmm=dpmm,
-                label_width_in=width_in,
-                label_height_in=height_in,
-                index=0,
-                timeout_s=30,
-            )
+        template, variables = _prepare_template(payload.template, payload.sample_data, template_name=payload.name)
+        preview_png = _render_template_preview(template, variables, payload.preview_target)
+        if preview_png is not None:
+            preview_png = _compact_png(preview_png)
         entry = save_template_entry(
             name=payload.name,
             tags=payload.tags,
@@ -689,11 +853,7 @@ def save_template(payload: TemplateSaveRequest) -> TemplateDetailResponse:
             sample_data=payload.sample_data,
             preview_png=preview_png,
         )
-    except TemplateValidationError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except TemplateRenderError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except (CompilationError, LayoutError, ValueError) as exc:
+    except _TEMPLATE_ERRORS as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except RuntimeError as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
@@ -708,7 +868,7 @@ def save_template(payload: TemplateSaveRequest) -> TemplateDetailResponse:
         tags=entry.tags,
         variables=entry.variables,
         preview_target=entry.preview_target,
-        preview_available=entry.preview_path.exists(),
+        preview_available=preview_png is not None,
         template=template_json,
         sample_data=sample_json,
     )
@@ -717,40 +877,10 @@ def save_template(payload: TemplateSaveRequest) -> TemplateDetailResponse:
 @app.put("/v1/templates/{template_id}", response_model=TemplateDetailResponse)
 def update_template(template_id: str, payload: TemplateSaveRequest) -> TemplateDetailResponse:
     try:
-        template = load_template(payload.template)
-        used_names = collect_template_placeholders(template)
-        macro_vars = build_macro_variables(
-            used_names,
-            existing_variables=payload.sample_data,
-            context=MacroContext(
-                template_name=payload.name,
-                printer_id=None,
-                draft_id=None,
-                now=now_for_macros(),
-                increment_counters=False,
-            ),
-        )
-        variables = {**macro_vars, **payload.sample_data}
-        _assert_variables_present(template, variables)
-        preview_png = None
-        if _labelary_templates_enabled():
-            target = LabelTarget(
-                width_mm=payload.preview_target.width_mm,
-                height_mm=payload.preview_target.height_mm,
-                dpi=payload.preview_target.dpi,
-                origin_x_mm=payload.preview_target.origin_x_mm,
-                origin_y_mm=payload.preview_target.origin_y_mm,
-            )
-            zpl = template.compile(target=target, variables=variables, debug=False)
-            dpmm, width_in, height_in = _target_to_labelary_args(payload.preview_target)
-            preview_png = render_labelary_png_bytes(
-                zpl,
-                dpmm=dpmm,
-                label_width_in=width_in,
-                label_height_in=height_in,
-                index=0,
-                timeout_s=30,
-            )
+        template, variables = _prepare_template(payload.template, payload.sample_data, template_name=payload.name)
+        preview_png = _render_template_preview(template, variables, payload.preview_target)
+        if preview_png is not None:
+            preview_png = _compact_png(preview_png)
         entry = update_template_entry(
             template_id=template_id,
             name=payload.name,
@@ -763,11 +893,7 @@ def update_template(template_id: str, payload: TemplateSaveRequest) -> TemplateD
         )
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f'Template not found: {template_id}') from None
-    except TemplateValidationError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except TemplateRenderError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
-    except (CompilationError, LayoutError, ValueError) as exc:
+    except _TEMPLATE_ERRORS as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except RuntimeError as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
@@ -782,7 +908,7 @@ def update_template(template_id: str, payload: TemplateSaveRequest) -> TemplateD
         tags=entry.tags,
         variables=entry.variables,
         preview_target=entry.preview_target,
-        preview_available=entry.preview_path.exists(),
+        preview_available=preview_png is not None,
         template=template_json,
         sample_data=sample_json,
     )
@@ -835,27 +961,41 @@ def get_template_entry(template_id: str) -> TemplateDetailResponse:
 
 
 @app.get("/v1/templates/{template_id}/preview")
-def get_template_preview(template_id: str) -> Response:
+def get_template_preview(template_id: str, request: Request) -> Response:
     try:
         entry = load_template_entry(template_id)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f'Template not found: {template_id}') from None
 
-    preview_path = entry.preview_path
-    if not preview_path.exists():
-        raise HTTPException(status_code=404, detail='Preview not found')
     try:
-        image_bytes = preview_path.read_bytes()
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
-    return Response(content=image_bytes, media_type="image/png")
+        stat = entry.preview_path.stat()
+    except OSError:
+        raise HTTPException(status_code=404, detail='Preview not found') from None
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    return FileResponse(entry.preview_path, media_type="image/png", stat_result=stat, headers={'ETag': etag})
+
+
+@app.post("/v1/cache/clear", status_code=204)
+def clear_caches() -> Response:
+    _render_png.cache_clear()
+    _load_template_cached.cache_clear()
+    with _COMPILE_CACHE_LOCK:
+        _COMPILE_CACHE.clear()
+    clear_compile_caches()
+    clear_width_cache()
+    return Response(status_code=204)
 
 
 @app.get("/v1/printers", response_model=PrintersConfigResponse)
-def get_printers() -> PrintersConfigResponse:
+def get_printers(request: Request) -> Response:
     config = getattr(app.state, 'printers_config', None) or load_printers_config()
     app.state.printers_config = config
-    return PrintersConfigResponse(**config)
+    body, etag = _printers_config_payload(config)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={'ETag': etag})
+    return Response(content=body, media_type="application/json", headers={'ETag': etag})
 
 
 @app.get("/v1/printers/{printer_id}")
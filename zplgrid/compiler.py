@@ -1,31 +1,53 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import base64
 import io
 import os
+import threading
 import warnings
+from functools import lru_cache
 from typing import Any, Mapping, Optional
 
 from .exceptions import CompilationError
-from .layout import compute_layout
+from .layout import LayoutResult, compute_layout, padding_to_dots
 from .measure import TextMeasurer, ZplMeasuredTextMeasurer
-from .model import DataMatrixElement, ImageElement, LeafNode, LabelTarget, LineElement, QrElement, Template, TextElement
+from .model import DataMatrixElement, ImageElement, LabelTarget, LineElement, Node, QrElement, Template, TextElement
+from .parser import load_template
 from .render import RenderOptions, render_text
 from .units import clamp_int, mm_to_dots
 from .zpl import ZplBuilder, ZplOptions, encode_field_data
 from .zpl_2d import DataMatrixZplBuilder, QrCodeZplBuilder
 
 
+_IMAGE_GFA_CACHE: dict[tuple, tuple[int, int, str, int, int]] = {}
+_IMAGE_GFA_CACHE_SIZE = 64
+_IMAGE_GFA_CACHE_LOCK = threading.Lock()
+_RESIZE_REDUCING_GAP = 3.0
+_LAYOUT_CACHE: dict[tuple[int, int, int, int], tuple[Node, LayoutResult]] = {}
+_LAYOUT_CACHE_SIZE = 64
+_LAYOUT_CACHE_LOCK = threading.Lock()
+_JUSTIFICATION_CODES = {'left': 'L', 'center': 'C', 'right': 'R'}
+
+
 def compile_zpl(template_json: str | bytes | Mapping[str, Any], *, target: LabelTarget, variables: Optional[Mapping[str, Any]] = None, debug: bool = False) -> str:
-    from .parser import load_template
     template = load_template(template_json)
     return template.compile(target=target, variables=variables or {}, debug=debug)
 
 
+def clear_compile_caches() -> None:
+    with _IMAGE_GFA_CACHE_LOCK:
+        _IMAGE_GFA_CACHE.clear()
+    with _LAYOUT_CACHE_LOCK:
+        _LAYOUT_CACHE.clear()
+    _qr_make_symbol.cache_clear()
+    _datamatrix_base_image.cache_clear()
+
+
 @dataclass
 class Compiler:
     text_measurer: TextMeasurer = ZplMeasuredTextMeasurer()
+    _dpi_measurers: dict[int, TextMeasurer] = field(default_factory=dict, init=False, repr=False)
 
     def compile(self, template: Template, *, target: LabelTarget, variables: Mapping[str, Any], debug: bool = False) -> str:
         width_dots = mm_to_dots(target.width_mm, target.dpi)
@@ -35,46 +57,55 @@ class Compiler:
 
         render_defaults = template.defaults.render_defaults
         render_opts = RenderOptions(missing_variables=str(render_defaults.get('missing_variables', 'error')))
-        zpl_opts = ZplOptions(emit_ci28=bool(template.defaults.render_defaults.get('emit_ci28', False)))
+        zpl_opts = ZplOptions(
+            emit_ci28=bool(render_defaults.get('emit_ci28', False)),
+            graphic_compression=str(render_defaults.get('graphic_compression', 'none')),
+        )
+        if zpl_opts.graphic_compression not in ('none', 'acs', 'z64'):
+            raise CompilationError(f'unsupported graphic_compression: {zpl_opts.graphic_compression!r}')
         debug_padding_guides = bool(render_defaults.get('debug_padding_guides', False))
         debug_gutter_guides = bool(render_defaults.get('debug_gutter_guides', False))
 
-        layout = compute_layout(template.layout, width_dots=width_dots, height_dots=height_dots, dpi=target.dpi)
+        layout = _cached_layout(template.layout, width_dots=width_dots, height_dots=height_dots, dpi=target.dpi)
 
         z = ZplBuilder(options=zpl_opts)
         z.start_label(width_dots=width_dots, height_dots=height_dots, origin_x=origin_x, origin_y=origin_y)
 
         for divider in layout.dividers:
-            if divider.rect.w <= 0 or divider.rect.h <= 0:
+            rect = divider.rect
+            if rect.w <= 0 or rect.h <= 0:
                 continue
-            thickness = max(1, divider.thickness)
-            z.field_origin(divider.rect.x, divider.rect.y)
-            z.graphic_box(width=divider.rect.w, height=divider.rect.h, thickness=thickness, color='B', rounding=0)
+            z.field_origin(rect.x, rect.y)
+            z.graphic_box(width=rect.w, height=rect.h, thickness=max(1, divider.thickness), color='B', rounding=0)
             z.field_separator()
 
         if debug_gutter_guides:
             for gutter in layout.gutters:
                 self._emit_gutter_guide(z, rect=gutter.rect, direction=gutter.direction)
 
+        dpi = target.dpi
         for leaf in layout.leaves:
-            if debug or leaf.node.debug_border:
+            node = leaf.node
+            if debug or node.debug_border:
                 self._emit_border(z, leaf.rect)
             if debug_padding_guides:
                 self._emit_padding_guide(z, leaf.content_rect)
 
-            element = leaf.node.elements[0]
-            element_box = self._compute_element_box(element=element, rect=leaf.content_rect, dpi=target.dpi)
+            if not node.elements:
+                continue
+            element = node.elements[0]
+            element_box = self._compute_element_box(element=element, rect=leaf.content_rect, dpi=dpi)
 
             if isinstance(element, TextElement):
-                self._emit_text(z, element=element, rect=element_box, variables=variables, render_opts=render_opts, dpi=target.dpi)
+                self._emit_text(z, element=element, rect=element_box, variables=variables, render_opts=render_opts, dpi=dpi)
             elif isinstance(element, QrElement):
-                self._emit_qr(z, element=element, rect=element_box, variables=variables, render_opts=render_opts, dpi=target.dpi)
+                self._emit_qr(z, element=element, rect=element_box, variables=variables, render_opts=render_opts, dpi=dpi)
             elif isinstance(element, DataMatrixElement):
-                self._emit_datamatrix(z, element=element, rect=element_box, variables=variables, render_opts=render_opts, dpi=target.dpi)
+                self._emit_datamatrix(z, element=element, rect=element_box, variables=variables, render_opts=render_opts, dpi=dpi)
             elif isinstance(element, ImageElement):
-                self._emit_image(z, element=element, rect=element_box, variables=variables, render_opts=render_opts, dpi=target.dpi)
+                self._emit_image(z, element=element, rect=element_box, variables=variables, render_opts=render_opts, dpi=dpi)
             elif isinstance(element, LineElement):
-                self._emit_line(z, element=element, rect=element_box, dpi=target.dpi)
+                self._emit_line(z, element=element, rect=element_box, dpi=dpi)
             else:
                 raise CompilationError(f'unsupported element type: {element.type!r}')
 
@@ -100,11 +131,7 @@ class Compiler:
         z.field_separator()
 
     def _compute_element_box(self, *, element, rect, dpi: int):
-        pad = element.padding_mm
-        left = mm_to_dots(pad.left, dpi)
-        top = mm_to_dots(pad.top, dpi)
-        right = mm_to_dots(pad.right, dpi)
-        bottom = mm_to_dots(pad.bottom, dpi)
+        left, top, right, bottom = padding_to_dots(element.padding_mm, dpi)
         box = rect.inset(left=left, top=top, right=right, bottom=bottom)
 
         if element.min_size_mm is not None:
@@ -124,6 +151,13 @@ class Compiler:
 
         return box
 
+    def _quiet_zone_rect(self, *, element: QrElement | DataMatrixElement, rect, dpi: int):
+        qz_mm = element.quiet_zone_mm
+        if qz_mm is None:
+            qz_mm = float(element.extensions.get('quiet_zone_mm', 0.0)) if element.extensions else 0.0
+        qz = mm_to_dots(float(qz_mm), dpi) if qz_mm else 0
+        return rect.inset(left=qz, top=qz, right=qz, bottom=qz)
+
     def _emit_text(self, z: ZplBuilder, *, element: TextElement, rect, variables: Mapping[str, Any], render_opts: RenderOptions, dpi: int) -> None:
         raw_text = render_text(element.text, variables, options=render_opts)
         raw_text = raw_text.replace('\r\n', '\n').replace('\r', '\n')
@@ -145,7 +179,7 @@ class Compiler:
         align_h = element.align_h or 'left'
         align_v = element.align_v or 'center'
 
-        justification = {'left': 'L', 'center': 'C', 'right': 'R'}[align_h]
+        justification = _JUSTIFICATION_CODES[align_h]
         line_spacing = 0
 
         box_x = rect.x
@@ -273,9 +307,13 @@ class Compiler:
         return (current_h, current_w)
 
     def _text_measurer_for_dpi(self, dpi: int) -> TextMeasurer:
+        cached = self._dpi_measurers.get(dpi)
+        if cached is not None:
+            return cached
         measurer = self.text_measurer
         if hasattr(measurer, 'for_dpi'):
-            return measurer.for_dpi(dpi)  # type: ignore[no-any-return]
+            measurer = measurer.for_dpi(dpi)
+        self._dpi_measurers[dpi] = measurer
         return measurer
 
     def _align_in_rect(self, *, rect, size_w: int, size_h: int, align_h: str, align_v: str) -> tuple[int, int]:
@@ -316,11 +354,7 @@ class Compiler:
             raise CompilationError(f'unsupported QR render_mode: {render_mode!r}')
 
         data = render_text(element.data, variables, options=render_opts)
-        qz_mm = element.quiet_zone_mm
-        if qz_mm is None:
-            qz_mm = float(element.extensions.get('quiet_zone_mm', 0.0)) if element.extensions else 0.0
-        qz = mm_to_dots(float(qz_mm), dpi) if qz_mm else 0
-        inner = rect.inset(left=qz, top=qz, right=qz, bottom=qz)
+        inner = self._quiet_zone_rect(element=element, rect=rect, dpi=dpi)
 
         model = 2
         mag = element.magnification or _default_qr_magnification(dpi)
@@ -389,11 +423,7 @@ class Compiler:
             raise CompilationError(f'unsupported DataMatrix render_mode: {render_mode!r}')
 
         data = render_text(element.data, variables, options=render_opts)
-        qz_mm = element.quiet_zone_mm
-        if qz_mm is None:
-            qz_mm = float(element.extensions.get('quiet_zone_mm', 0.0)) if element.extensions else 0.0
-        qz = mm_to_dots(float(qz_mm), dpi) if qz_mm else 0
-        inner = rect.inset(left=qz, top=qz, right=qz, bottom=qz)
+        inner = self._quiet_zone_rect(element=element, rect=rect, dpi=dpi)
 
         module_mm = element.module_size_mm or 0.5
         size_mode = element.size_mode or 'fixed'
@@ -488,11 +518,7 @@ class Compiler:
         dpi: int,
     ) -> None:
         data = render_text(element.data, variables, options=render_opts)
-        qz_mm = element.quiet_zone_mm
-        if qz_mm is None:
-            qz_mm = float(element.extensions.get('quiet_zone_mm', 0.0)) if element.extensions else 0.0
-        qz = mm_to_dots(float(qz_mm), dpi) if qz_mm else 0
-        inner = rect.inset(left=qz, top=qz, right=qz, bottom=qz)
+        inner = self._quiet_zone_rect(element=element, rect=rect, dpi=dpi)
 
         size_mode = element.size_mode or 'fixed'
         align_h = element.align_h or 'center'
@@ -551,27 +577,30 @@ class Compiler:
         except Exception as e:
             raise CompilationError(f'Pillow is required for QR images: {e}') from e
 
-        img = Image.new('L', (size_w, size_h), 255)
-        draw = ImageDraw.Draw(img)
-        for row_idx, row in enumerate(matrix):
-            for col_idx, is_dark in enumerate(row):
-                if not is_dark:
-                    continue
-                shape = finder_shape if _qr_is_finder_module(row_idx, col_idx, modules) else module_shape
-                x0 = col_idx * int(mag)
-                y0 = row_idx * int(mag)
-                x1 = x0 + int(mag)
-                y1 = y0 + int(mag)
-                if shape == 'circle':
-                    draw.ellipse((x0, y0, x1 - 1, y1 - 1), fill=0)
-                elif shape == 'rounded':
-                    radius = max(1, int(mag) // 3)
-                    if hasattr(draw, 'rounded_rectangle') and int(mag) >= 3:
-                        draw.rounded_rectangle((x0, y0, x1 - 1, y1 - 1), radius=radius, fill=0)
+        m = int(mag)
+        if m >= 1 and module_shape == 'square' and finder_shape == 'square':
+            modules_img = Image.frombytes('L', (modules, modules), bytes(0 if is_dark else 255 for row in matrix for is_dark in row))
+            img = modules_img.resize((size_w, size_h), resample=Image.Resampling.NEAREST)
+        else:
+            img = Image.new('L', (size_w, size_h), 255)
+            draw = ImageDraw.Draw(img)
+            radius = max(1, m // 3)
+            use_rounded = hasattr(draw, 'rounded_rectangle') and m >= 3
+            for row_idx, row in enumerate(matrix):
+                y0 = row_idx * m
+                y1 = y0 + m - 1
+                for col_idx, is_dark in enumerate(row):
+                    if not is_dark:
+                        continue
+                    shape = finder_shape if _qr_is_finder_module(row_idx, col_idx, modules) else module_shape
+                    x0 = col_idx * m
+                    box = (x0, y0, x0 + m - 1, y1)
+                    if shape == 'circle':
+                        draw.ellipse(box, fill=0)
+                    elif shape == 'rounded' and use_rounded:
+                        draw.rounded_rectangle(box, radius=radius, fill=0)
                     else:
-                        draw.rectangle((x0, y0, x1 - 1, y1 - 1), fill=0)
-                else:
-                    draw.rectangle((x0, y0, x1 - 1, y1 - 1), fill=0)
+                        draw.rectangle(box, fill=0)
 
         data_hex, bytes_per_row, total_bytes = self._image_to_gfa(
             img,
@@ -594,11 +623,7 @@ class Compiler:
         dpi: int,
     ) -> None:
         data = render_text(element.data, variables, options=render_opts)
-        qz_mm = element.quiet_zone_mm
-        if qz_mm is None:
-            qz_mm = float(element.extensions.get('quiet_zone_mm', 0.0)) if element.extensions else 0.0
-        qz = mm_to_dots(float(qz_mm), dpi) if qz_mm else 0
-        inner = rect.inset(left=qz, top=qz, right=qz, bottom=qz)
+        inner = self._quiet_zone_rect(element=element, rect=rect, dpi=dpi)
 
         size_mode = element.size_mode or 'fixed'
         align_h = element.align_h or 'center'
@@ -665,7 +690,6 @@ class Compiler:
         if not image_bytes:
             raise CompilationError('image source data is empty')
 
-        img = self._decode_image(image_bytes)
         fit = element.fit or 'contain'
         align_h = element.align_h or 'center'
         align_v = element.align_v or 'center'
@@ -685,14 +709,34 @@ class Compiler:
         if threshold < 0 or threshold > 255:
             raise CompilationError('image threshold must be between 0 and 255')
 
-        target_img, size_w, size_h = self._prepare_image(
-            img,
-            rect_w=rect.w,
-            rect_h=rect.h,
-            fit=fit,
-            input_dpi=input_dpi,
-            target_dpi=dpi,
-        )
+        cache_key = (image_bytes, rect.w, rect.h, fit, input_dpi, dpi, invert, threshold, dither)
+        cached = _IMAGE_GFA_CACHE.get(cache_key)
+        if cached is None:
+            img = self._decode_image(image_bytes)
+            target_img, size_w, size_h = self._prepare_image(
+                img,
+                rect_w=rect.w,
+                rect_h=rect.h,
+                fit=fit,
+                input_dpi=input_dpi,
+                target_dpi=dpi,
+            )
+            if size_w <= 0 or size_h <= 0:
+                cached = (size_w, size_h, '', 0, 0)
+            else:
+                data, bytes_per_row, total_bytes = self._image_to_gfa(
+                    target_img,
+                    invert=invert,
+                    threshold=threshold,
+                    dither=dither,
+                )
+                cached = (size_w, size_h, data, bytes_per_row, total_bytes)
+            with _IMAGE_GFA_CACHE_LOCK:
+                if len(_IMAGE_GFA_CACHE) >= _IMAGE_GFA_CACHE_SIZE:
+                    _IMAGE_GFA_CACHE.pop(next(iter(_IMAGE_GFA_CACHE)))
+                _IMAGE_GFA_CACHE[cache_key] = cached
+
+        size_w, size_h, data, bytes_per_row, total_bytes = cached
         if size_w <= 0 or size_h <= 0:
             return
 
@@ -702,12 +746,6 @@ class Compiler:
         else:
             x, y = self._align_in_rect(rect=rect, size_w=size_w, size_h=size_h, align_h=align_h, align_v=align_v)
 
-        data, bytes_per_row, total_bytes = self._image_to_gfa(
-            target_img,
-            invert=invert,
-            threshold=threshold,
-            dither=dither,
-        )
         z.field_origin(x, y)
         z.graphic_field(total_bytes=total_bytes, bytes_per_row=bytes_per_row, data=data)
         z.field_separator()
@@ -756,9 +794,9 @@ class Compiler:
 
         if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
             bg = Image.new('RGBA', img.size, (255, 255, 255, 255))
-            img = Image.alpha_composite(bg, img.convert('RGBA')).convert('RGB')
+            img = Image.alpha_composite(bg, img.convert('RGBA')).convert('L')
         else:
-            img = img.convert('RGB')
+            img = img.convert('L')
         return img
 
     def _prepare_image(
@@ -789,12 +827,12 @@ class Compiler:
                 w = max(1, int(round(w * scale)))
                 h = max(1, int(round(h * scale)))
                 if w != img.size[0] or h != img.size[1]:
-                    img = img.resize((w, h), resample=resample)
+                    img = img.resize((w, h), resample=resample, reducing_gap=_RESIZE_REDUCING_GAP)
             return img, w, h
 
         if fit == 'stretch':
             if w != rect_w or h != rect_h:
-                img = img.resize((rect_w, rect_h), resample=resample)
+                img = img.resize((rect_w, rect_h), resample=resample, reducing_gap=_RESIZE_REDUCING_GAP)
             return img, rect_w, rect_h
 
         if fit in ('contain', 'cover'):
@@ -802,7 +840,7 @@ class Compiler:
             target_w = max(1, int(round(w * scale)))
             target_h = max(1, int(round(h * scale)))
             if target_w != w or target_h != h:
-                img = img.resize((target_w, target_h), resample=resample)
+                img = img.resize((target_w, target_h), resample=resample, reducing_gap=_RESIZE_REDUCING_GAP)
             if fit == 'cover':
                 left = max(0, (target_w - rect_w) // 2)
                 top = max(0, (target_h - rect_h) // 2)
@@ -818,58 +856,67 @@ class Compiler:
         from PIL import Image
 
         if dither == 'floyd_steinberg':
-            bw = img.convert('L').convert('1', dither=Image.FLOYDSTEINBERG)
-            pixels = bw.load()
-            w, h = bw.size
-            get_pixel = lambda x, y: pixels[x, y]
-            to_black = lambda v: v == 0
+            gray = img.convert('L').convert('1', dither=Image.FLOYDSTEINBERG).convert('L')
+            lut = [255 if (v == 0) != invert else 0 for v in range(256)]
+            mask = gray.point(lut, '1')
+        elif dither == 'bayer':
+            mask = _bayer_mask(img.convert('L'), threshold=threshold, invert=invert)
         else:
-            gray = img.convert('L')
-            pixels = gray.load()
-            w, h = gray.size
-            if dither == 'bayer':
-                matrix = (
-                    (0, 8, 2, 10),
-                    (12, 4, 14, 6),
-                    (3, 11, 1, 9),
-                    (15, 7, 13, 5),
-                )
-                offset = threshold - 128
-
-                def to_black(value, x, y):
-                    t = (matrix[y % 4][x % 4] + 0.5) * 16
-                    return (value + offset) < t
-            else:
-                def to_black(value, _x, _y):
-                    return value < threshold
-
-            get_pixel = lambda x, y: pixels[x, y]
+            lut = [255 if (v < threshold) != invert else 0 for v in range(256)]
+            mask = img.convert('L').point(lut, '1')
 
+        w = mask.size[0]
         bytes_per_row = (w + 7) // 8
-        data_bytes = bytearray()
-        for y in range(h):
-            byte = 0
-            bit = 7
-            for x in range(w):
-                if dither == 'floyd_steinberg':
-                    is_black = to_black(get_pixel(x, y))
-                else:
-                    is_black = to_black(get_pixel(x, y), x, y)
-                if invert:
-                    is_black = not is_black
-                if is_black:
-                    byte |= (1 << bit)
-                bit -= 1
-                if bit < 0:
-                    data_bytes.append(byte)
-                    byte = 0
-                    bit = 7
-            if bit != 7:
-                data_bytes.append(byte)
-
-        total_bytes = len(data_bytes)
-        hex_data = ''.join(f'{b:02X}' for b in data_bytes)
-        return hex_data, bytes_per_row, total_bytes
+        data_bytes = mask.tobytes()
+        return data_bytes.hex().upper(), bytes_per_row, len(data_bytes)
+
+
+_BAYER_4X4 = (
+    (0, 8, 2, 10),
+    (12, 4, 14, 6),
+    (3, 11, 1, 9),
+    (15, 7, 13, 5),
+)
+
+
+_DEFAULT_COMPILER = Compiler()
+
+
+def _cached_layout(root: Node, *, width_dots: int, height_dots: int, dpi: int) -> LayoutResult:
+    key = (id(root), width_dots, height_dots, dpi)
+    cached = _LAYOUT_CACHE.get(key)
+    if cached is not None and cached[0] is root:
+        return cached[1]
+    layout = compute_layout(root, width_dots=width_dots, height_dots=height_dots, dpi=dpi)
+    with _LAYOUT_CACHE_LOCK:
+        if len(_LAYOUT_CACHE) >= _LAYOUT_CACHE_SIZE:
+            _LAYOUT_CACHE.pop(next(iter(_LAYOUT_CACHE)))
+        _LAYOUT_CACHE[key] = (root, layout)
+    return layout
+
+
+def _bayer_mask(gray, *, threshold: int, invert: bool):
+    from PIL import Image
+
+    w, h = gray.size
+    offset = threshold - 128
+    luts = [
+        [
+            bytes(255 if ((v + offset) < (cell + 0.5) * 16) != invert else 0 for v in range(256))
+            for cell in row
+        ]
+        for row in _BAYER_4X4
+    ]
+    src = gray.tobytes()
+    out = bytearray(len(src))
+    for y in range(h):
+        row_start = y * w
+        row_end = row_start + w
+        row_luts = luts[y % 4]
+        for phase in range(min(4, w)):
+            cells = slice(row_start + phase, row_end, 4)
+            out[cells] = src[cells].translate(row_luts[phase])
+    return Image.frombytes('L', (w, h), bytes(out)).point([0] * 128 + [255] * 128, '1')
 
 
 def _env_flag_enabled(name: str) -> bool:
@@ -897,6 +944,7 @@ def _env_int(name: str, *, default: int) -> int:
         return default
 
 
+@lru_cache(maxsize=256)
 def _qr_make_symbol(*, data: str, ecc: str, input_mode: str, character_mode: Optional[str]):
     try:
         import segno
@@ -925,6 +973,11 @@ def _qr_make_symbol(*, data: str, ecc: str, input_mode: str, character_mode: Opt
 
 
 def _datamatrix_image_from_data(data: str):
+    return _datamatrix_base_image(data).copy()
+
+
+@lru_cache(maxsize=256)
+def _datamatrix_base_image(data: str):
     try:
         from PIL import Image
     except Exception as e:
@@ -6,12 +6,16 @@ import threading
 import time
 
 import requests
+from urllib3.util.retry import Retry
 
 
 _RATE_LIMIT_LOCK = threading.Lock()
 _LAST_REQUEST_AT = 0.0
 _MIN_SECONDS_BETWEEN_REQUESTS = 0.4
 
+_SESSION_LOCK = threading.Lock()
+_SESSION: requests.Session | None = None
+
 
 @dataclass(frozen=True)
 class LabelaryWarning:
@@ -36,6 +40,41 @@ def _rate_limit_labelary() -> None:
         _LAST_REQUEST_AT = time.monotonic()
 
 
+def _shared_session() -> requests.Session:
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=16,
+                    max_retries=Retry(connect=3, read=0, backoff_factor=0.1),
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _SESSION = session
+    return _SESSION
+
+
+def _labelary_url(dpmm: int, label_width_in: float, label_height_in: float, index: int) -> str:
+    return f'http://api.labelary.com/v1/printers/{dpmm}dpmm/labels/{label_width_in}x{label_height_in}/{index}/'
+
+
+def _post_labelary(url: str, *, headers: dict[str, str], timeout_s: int, session: requests.Session | None, **body) -> requests.Response:
+    post = (session or _shared_session()).post
+    for attempt in range(3):
+        _rate_limit_labelary()
+        resp = post(url, headers=headers, stream=True, timeout=timeout_s, **body)
+        if resp.status_code == 429 and attempt < 2:
+            time.sleep(0.75)
+            continue
+        if resp.status_code != 200:
+            raise RuntimeError(f'Labelary error {resp.status_code}: {resp.text}')
+        break
+    return resp
+
+
 def _parse_labelary_warnings(header: str) -> list[LabelaryWarning]:
     if not header:
         return []
@@ -74,22 +113,12 @@ def render_labelary_png(
     label_height_in: float = 6.0,
     index: int = 0,
     timeout_s: int = 30,
+    session: requests.Session | None = None,
 ) -> Path:
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    url = f'http://api.labelary.com/v1/printers/{dpmm}dpmm/labels/{label_width_in}x{label_height_in}/{index}/'
-    files = {'file': zpl}
-    headers = {'Accept': 'image/png'}
-
-    for attempt in range(3):
-        _rate_limit_labelary()
-        resp = requests.post(url, headers=headers, files=files, stream=True, timeout=timeout_s)
-        if resp.status_code == 429 and attempt < 2:
-            time.sleep(0.75)
-            continue
-        if resp.status_code != 200:
-            raise RuntimeError(f'Labelary error {resp.status_code}: {resp.text}')
-        break
+    url = _labelary_url(dpmm, label_width_in, label_height_in, index)
+    resp = _post_labelary(url, headers={'Accept': 'image/png'}, timeout_s=timeout_s, session=session, files={'file': zpl})
 
     with out_path.open('wb') as f:
         for chunk in resp.iter_content(chunk_size=1024 * 64):
@@ -107,21 +136,10 @@ def render_labelary_png_bytes(
     label_height_in: float = 6.0,
     index: int = 0,
     timeout_s: int = 30,
+    session: requests.Session | None = None,
 ) -> bytes:
-    url = f'http://api.labelary.com/v1/printers/{dpmm}dpmm/labels/{label_width_in}x{label_height_in}/{index}/'
-    files = {'file': zpl}
-    headers = {'Accept': 'image/png'}
-
-    for attempt in range(3):
-        _rate_limit_labelary()
-        resp = requests.post(url, headers=headers, files=files, stream=True, timeout=timeout_s)
-        if resp.status_code == 429 and attempt < 2:
-            time.sleep(0.75)
-            continue
-        if resp.status_code != 200:
-            raise RuntimeError(f'Labelary error {resp.status_code}: {resp.text}')
-        break
-
+    url = _labelary_url(dpmm, label_width_in, label_height_in, index)
+    resp = _post_labelary(url, headers={'Accept': 'image/png'}, timeout_s=timeout_s, session=session, files={'file': zpl})
     return resp.content
 
 
@@ -134,20 +152,11 @@ def lint_labelary_zpl(
     index: int = 0,
     timeout_s: int = 30,
     compact: bool = True,
+    session: requests.Session | None = None,
 ) -> list[LabelaryWarning]:
     if compact:
         zpl = _compact_zpl(zpl)
-    url = f'http://api.labelary.com/v1/printers/{dpmm}dpmm/labels/{label_width_in}x{label_height_in}/{index}/'
+    url = _labelary_url(dpmm, label_width_in, label_height_in, index)
     headers = {'Accept': 'image/png', 'X-Linter': 'On', 'Content-Type': 'application/x-www-form-urlencoded'}
-
-    for attempt in range(3):
-        _rate_limit_labelary()
-        resp = requests.post(url, headers=headers, data=zpl.encode('utf-8'), stream=True, timeout=timeout_s)
-        if resp.status_code == 429 and attempt < 2:
-            time.sleep(0.75)
-            continue
-        if resp.status_code != 200:
-            raise RuntimeError(f'Labelary error {resp.status_code}: {resp.text}')
-        break
-
+    resp = _post_labelary(url, headers=headers, timeout_s=timeout_s, session=session, data=zpl.encode('utf-8'))
     return _parse_labelary_warnings(resp.headers.get('X-Warnings', ''))
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, Mapping
+from functools import lru_cache
+from typing import Mapping
 
 from .exceptions import LayoutError
-from .model import LeafNode, Node, Rect, SplitNode
+from .model import LeafNode, Node, PaddingMm, Rect, SplitNode
 from .units import mm_to_dots
 
 
@@ -44,18 +45,21 @@ def compute_layout(root: Node, *, width_dots: int, height_dots: int, dpi: int) -
     gutters: list[GutterGuideLayout] = []
     alias_to_id: dict[str, str] = {}
 
-    root_rect = Rect(x=0, y=0, w=width_dots, h=height_dots)
-    _walk(
-        root,
-        node_id='r',
-        rect=root_rect,
-        dpi=dpi,
-        node_rects=node_rects,
-        leaves=leaves,
-        dividers=dividers,
-        gutters=gutters,
-        alias_to_id=alias_to_id,
-    )
+    stack: list[tuple[Node, str, Rect]] = [(root, 'r', Rect(x=0, y=0, w=width_dots, h=height_dots))]
+    while stack:
+        node, node_id, rect = stack.pop()
+        children = _place_node(
+            node,
+            node_id=node_id,
+            rect=rect,
+            dpi=dpi,
+            node_rects=node_rects,
+            leaves=leaves,
+            dividers=dividers,
+            gutters=gutters,
+            alias_to_id=alias_to_id,
+        )
+        stack.extend(reversed(children))
     return LayoutResult(
         node_rects=node_rects,
         leaves=tuple(leaves),
@@ -65,7 +69,17 @@ def compute_layout(root: Node, *, width_dots: int, height_dots: int, dpi: int) -
     )
 
 
-def _walk(
+@lru_cache(maxsize=256)
+def padding_to_dots(pad: PaddingMm, dpi: int) -> tuple[int, int, int, int]:
+    return (
+        mm_to_dots(pad.left, dpi),
+        mm_to_dots(pad.top, dpi),
+        mm_to_dots(pad.right, dpi),
+        mm_to_dots(pad.bottom, dpi),
+    )
+
+
+def _place_node(
     node: Node,
     *,
     node_id: str,
@@ -76,20 +90,16 @@ def _walk(
     dividers: list[SplitDividerLayout],
     gutters: list[GutterGuideLayout],
     alias_to_id: dict[str, str],
-) -> None:
+) -> tuple[tuple[Node, str, Rect], ...]:
     node_rects[node_id] = rect
     if node.alias:
         alias_to_id[node.alias] = node_id
 
     if isinstance(node, LeafNode):
-        pad = node.padding_mm
-        left = mm_to_dots(pad.left, dpi)
-        top = mm_to_dots(pad.top, dpi)
-        right = mm_to_dots(pad.right, dpi)
-        bottom = mm_to_dots(pad.bottom, dpi)
+        left, top, right, bottom = padding_to_dots(node.padding_mm, dpi)
         content = rect.inset(left=left, top=top, right=right, bottom=bottom)
         leaves.append(LeafLayout(node_id=node_id, node=node, rect=rect, content_rect=content))
-        return
+        return ()
 
     if not isinstance(node, SplitNode):
         raise LayoutError(f'unknown node type at {node_id}')
@@ -113,9 +123,7 @@ def _walk(
             thickness = mm_to_dots(node.divider.thickness_mm, dpi)
             line_x = rect.x + child0_w + (gutter - thickness) // 2
             dividers.append(SplitDividerLayout(rect=Rect(x=line_x, y=rect.y, w=thickness, h=rect.h), thickness=thickness))
-        _walk(node.children[0], node_id=f'{node_id}/0', rect=child0, dpi=dpi, node_rects=node_rects, leaves=leaves, dividers=dividers, gutters=gutters, alias_to_id=alias_to_id)
-        _walk(node.children[1], node_id=f'{node_id}/1', rect=child1, dpi=dpi, node_rects=node_rects, leaves=leaves, dividers=dividers, gutters=gutters, alias_to_id=alias_to_id)
-        return
+        return ((node.children[0], f'{node_id}/0', child0), (node.children[1], f'{node_id}/1', child1))
 
     if node.direction == 'h':
         available = rect.h - gutter
@@ -132,8 +140,6 @@ def _walk(
             thickness = mm_to_dots(node.divider.thickness_mm, dpi)
             line_y = rect.y + child0_h + (gutter - thickness) // 2
             dividers.append(SplitDividerLayout(rect=Rect(x=rect.x, y=line_y, w=rect.w, h=thickness), thickness=thickness))
-        _walk(node.children[0], node_id=f'{node_id}/0', rect=child0, dpi=dpi, node_rects=node_rects, leaves=leaves, dividers=dividers, gutters=gutters, alias_to_id=alias_to_id)
-        _walk(node.children[1], node_id=f'{node_id}/1', rect=child1, dpi=dpi, node_rects=node_rects, leaves=leaves, dividers=dividers, gutters=gutters, alias_to_id=alias_to_id)
-        return
+        return ((node.children[0], f'{node_id}/0', child0), (node.children[1], f'{node_id}/1', child1))
 
     raise LayoutError(f'invalid split direction at {node_id}: {node.direction!r}')
@@ -4,13 +4,18 @@ import json
 import os
 import string
 import uuid
+from contextlib import nullcontext
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Iterable, Mapping
 
+from .file_lock import interprocess_lock
+
 
 _COUNTERS_PATH = Path(os.getenv('ZPLGRID_COUNTERS_PATH', 'counters.json'))
+_COUNTERS_LOCK_PATH = _COUNTERS_PATH.with_suffix('.lock')
+_FORMATTER = string.Formatter()
 
 
 @dataclass(frozen=True)
@@ -23,11 +28,10 @@ class MacroContext:
 
 
 def collect_template_placeholders(template) -> set[str]:
-    formatter = string.Formatter()
     used: set[str] = set()
 
     def add_from_text(text: str) -> None:
-        for _, field_name, _, _ in formatter.parse(text):
+        for _, field_name, _, _ in _FORMATTER.parse(text):
             if not field_name:
                 continue
             base = field_name.split('.', 1)[0].split('[', 1)[0]
@@ -72,14 +76,19 @@ def build_macro_variables(
         if name in available:
             macros[name] = value
 
-    add_if('_now_iso', now.isoformat())
-    add_if('_date_yyyy_mm_dd', now.strftime('%Y-%m-%d'))
-    add_if('_date_dd_mm_yyyy', now.strftime('%d.%m.%Y'))
-    add_if('_time_hh_mm', now.strftime('%H:%M'))
-    add_if('_time_hh_mm_ss', now.strftime('%H:%M:%S'))
-    add_if('_timestamp_ms', int(now.timestamp() * 1000))
-    add_if('_uuid', str(uuid.uuid4()))
-    add_if('_short_id', uuid.uuid4().hex[:8])
+    value_factories = {
+        '_now_iso': now.isoformat,
+        '_date_yyyy_mm_dd': lambda: today,
+        '_date_dd_mm_yyyy': lambda: now.strftime('%d.%m.%Y'),
+        '_time_hh_mm': lambda: now.strftime('%H:%M'),
+        '_time_hh_mm_ss': lambda: now.strftime('%H:%M:%S'),
+        '_timestamp_ms': lambda: int(now.timestamp() * 1000),
+        '_uuid': lambda: str(uuid.uuid4()),
+        '_short_id': lambda: uuid.uuid4().hex[:8],
+    }
+    for name, make_value in value_factories.items():
+        if name in available:
+            macros[name] = make_value()
 
     if context.draft_id:
         add_if('_draft_id', context.draft_id)
@@ -100,21 +109,23 @@ def build_macro_variables(
         counter_map['_counter_template_daily'] = (f'template:{context.template_name}', True)
 
     if any(name in available for name in counter_map):
-        store = _load_counters()
-        for macro_name, (key, daily) in counter_map.items():
-            if macro_name not in available:
-                continue
-            value = _next_counter(
-                store,
-                key=key,
-                daily=daily,
-                today=today,
-                increment=context.increment_counters,
-            )
-            macros[macro_name] = value
-        if context.increment_counters and store.get('_dirty'):
-            store.pop('_dirty', None)
-            _save_counters(store)
+        lock = interprocess_lock(_COUNTERS_LOCK_PATH) if context.increment_counters else nullcontext()
+        with lock:
+            store = _load_counters()
+            for macro_name, (key, daily) in counter_map.items():
+                if macro_name not in available:
+                    continue
+                value = _next_counter(
+                    store,
+                    key=key,
+                    daily=daily,
+                    today=today,
+                    increment=context.increment_counters,
+                )
+                macros[macro_name] = value
+            if context.increment_counters and store.get('_dirty'):
+                store.pop('_dirty', None)
+                _save_counters(store)
 
     return macros
 
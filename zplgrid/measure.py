@@ -3,10 +3,32 @@ from __future__ import annotations
 import math
 from dataclasses import dataclass
 import os
+import threading
 
 from .zpl_text_metrics import ZplFontSpec, ZplTextMeasurer
 
 
+_WIDTH_CACHE_MAX_ENTRIES = 4096
+_CACHE_LOCK = threading.Lock()
+_SHARED_WIDTH_CACHES: dict[tuple[int, int, bool], dict[tuple[str, int, int], int]] = {}
+_SHARED_WRAPPED_CACHES: dict[tuple[int, int, bool], dict[tuple[tuple[str, ...], int, int, int], TextMetrics]] = {}
+_SHARED_LINE_WRAP_CACHES: dict[tuple[int, int, bool], dict[tuple[str, int, int, int, str], tuple[str, ...]]] = {}
+
+
+def clear_width_cache() -> None:
+    with _CACHE_LOCK:
+        for caches in (_SHARED_WIDTH_CACHES, _SHARED_WRAPPED_CACHES, _SHARED_LINE_WRAP_CACHES):
+            for cache in caches.values():
+                cache.clear()
+
+
+def _cache_put(cache: dict, key: object, value: object) -> None:
+    with _CACHE_LOCK:
+        if len(cache) >= _WIDTH_CACHE_MAX_ENTRIES:
+            cache.pop(next(iter(cache), None), None)
+        cache[key] = value
+
+
 @dataclass(frozen=True)
 class TextMetrics:
     lines: int
@@ -78,6 +100,13 @@ class ZplMeasuredTextMeasurer(TextMeasurer):
             enable_network = os.getenv('LABELARY_ENABLE', '0') == '1'
         self._enable_network = enable_network
         self._width_cache: dict[tuple[str, int, int], int] = {}
+        self._wrapped_cache: dict[tuple[tuple[str, ...], int, int, int], TextMetrics] = {}
+        self._line_wrap_cache: dict[tuple[str, int, int, int, str], tuple[str, ...]] = {}
+        if enable_network:
+            cache_key = (dpmm, threshold, use_utf8)
+            self._width_cache = _SHARED_WIDTH_CACHES.setdefault(cache_key, self._width_cache)
+            self._wrapped_cache = _SHARED_WRAPPED_CACHES.setdefault(cache_key, self._wrapped_cache)
+            self._line_wrap_cache = _SHARED_LINE_WRAP_CACHES.setdefault(cache_key, self._line_wrap_cache)
 
     def for_dpi(self, dpi: int) -> 'ZplMeasuredTextMeasurer':
         dpmm = int(round(dpi / 25.4))
@@ -102,6 +131,10 @@ class ZplMeasuredTextMeasurer(TextMeasurer):
     ) -> list[str]:
         if box_width_dots <= 0:
             return [text]
+        key = (text, box_width_dots, font_height_dots, font_width_dots, wrap)
+        cached = self._line_wrap_cache.get(key)
+        if cached is not None:
+            return list(cached)
 
         paragraphs = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
         lines: list[str] = []
@@ -116,7 +149,9 @@ class ZplMeasuredTextMeasurer(TextMeasurer):
                 lines.extend(self._wrap_char(paragraph, box_width_dots, font_height_dots, font_width_dots))
             else:
                 lines.extend(self._wrap_word(paragraph, box_width_dots, font_height_dots, font_width_dots))
-        return lines or ['']
+        lines = lines or ['']
+        _cache_put(self._line_wrap_cache, key, tuple(lines))
+        return lines
 
     def measure_wrapped(
         self,
@@ -133,17 +168,27 @@ class ZplMeasuredTextMeasurer(TextMeasurer):
             width = max_chars * char_w
             height = len(lines) * (font_height_dots + line_spacing_dots)
             return TextMetrics(lines=len(lines), width_dots=width, height_dots=height)
-        max_line_width = 1
-        for line in lines:
-            width = self._line_width(line, font_height_dots, font_width_dots)
-            if width > max_line_width:
-                max_line_width = width
-        measurer = self._make_measurer(box_width_dots=max_line_width, font_height_dots=font_height_dots)
-        text = '\n'.join(lines)
-        ink = measurer.measure(text=text, font=font)
+        if not any(lines):
+            extra_spacing = max(0, len(lines) - 1) * max(0, line_spacing_dots)
+            return TextMetrics(lines=len(lines), width_dots=0, height_dots=extra_spacing)
+        key = (tuple(lines), font_height_dots, font_width_dots, line_spacing_dots)
+        cached = self._wrapped_cache.get(key)
+        if cached is not None:
+            return cached
+        if len(lines) == 1:
+            measurer = self._make_measurer(box_width_dots=max(1, font_width_dots), font_height_dots=font_height_dots)
+            ink = measurer.measure(text=lines[0], font=font)
+            self._remember_width((lines[0], font_height_dots, font_width_dots), ink.ink_width)
+        else:
+            max_line_width = max([1, *self._line_widths(lines, font_height_dots, font_width_dots)])
+            measurer = self._make_measurer(box_width_dots=max_line_width, font_height_dots=font_height_dots)
+            text = '\n'.join(lines)
+            ink = measurer.measure(text=text, font=font)
         extra_spacing = max(0, len(lines) - 1) * max(0, line_spacing_dots)
         height = ink.ink_height + extra_spacing
-        return TextMetrics(lines=len(lines), width_dots=ink.ink_width, height_dots=height)
+        metrics = TextMetrics(lines=len(lines), width_dots=ink.ink_width, height_dots=height)
+        _cache_put(self._wrapped_cache, key, metrics)
+        return metrics
 
     def estimate(
         self,
@@ -272,19 +317,34 @@ class ZplMeasuredTextMeasurer(TextMeasurer):
         if cached is not None:
             return cached
 
-        if not self._enable_network:
+        if not self._enable_network or not text:
             char_w = max(1, int(font_width_dots * 0.6))
             width = len(text) * char_w
-            self._width_cache[key] = width
+            self._remember_width(key, width)
             return width
 
         font = ZplFontSpec(font='0', orientation='N', height=font_height_dots, width=font_width_dots)
         measurer = self._make_measurer(box_width_dots=max(1, font_width_dots), font_height_dots=font_height_dots)
         ink = measurer.measure(text=text, font=font)
         width = ink.ink_width
-        self._width_cache[key] = width
+        self._remember_width(key, width)
         return width
 
+    def _remember_width(self, key: tuple[str, int, int], width: int) -> None:
+        _cache_put(self._width_cache, key, width)
+
+    def _line_widths(self, lines: list[str], font_height_dots: int, font_width_dots: int) -> list[int]:
+        missing = list(dict.fromkeys(
+            line for line in lines if line and (line, font_height_dots, font_width_dots) not in self._width_cache
+        ))
+        if len(missing) > 1:
+            font = ZplFontSpec(font='0', orientation='N', height=font_height_dots, width=font_width_dots)
+            measurer = self._make_measurer(box_width_dots=max(1, font_width_dots), font_height_dots=font_height_dots)
+            for line, ink in zip(missing, measurer.measure_lines(missing, font)):
+                if ink is not None:
+                    self._remember_width((line, font_height_dots, font_width_dots), ink.ink_width)
+        return [self._line_width(line, font_height_dots, font_width_dots) for line in lines]
+
     def _make_measurer(self, *, box_width_dots: int, font_height_dots: int) -> ZplTextMeasurer:
         dpmm = self._dpmm
         width_in = max(self._label_w_in, box_width_dots / (dpmm * 25.4))
@@ -173,5 +173,5 @@ class Template:
     extensions: dict[str, Any] = field(default_factory=dict)
 
     def compile(self, target: LabelTarget, variables: Optional[Mapping[str, Any]] = None, *, debug: bool = False) -> str:
-        from .compiler import Compiler
-        return Compiler().compile(self, target=target, variables=dict(variables or {}), debug=debug)
+        from .compiler import _DEFAULT_COMPILER
+        return _DEFAULT_COMPILER.compile(self, target=target, variables=dict(variables or {}), debug=debug)
@@ -1,10 +1,9 @@
 from __future__ import annotations
 
 import json
-from dataclasses import replace
 from typing import Any, Mapping, Optional
 
-from .exceptions import TemplateIssue, TemplateValidationError
+from .exceptions import TemplateValidationError
 from .model import (
     DataMatrixElement,
     Divider,
@@ -1,7 +1,35 @@
 from __future__ import annotations
 
+import os
 import socket
-from typing import Any, Mapping
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping
+
+from .file_lock import interprocess_lock
+
+
+_PRINT_MODE_CODES = {
+    'tear_off': 'T',
+    'peel_off': 'P',
+    'rewind': 'R',
+    'cutter': 'C',
+    'delayed_cut': 'D',
+    'applicator': 'A',
+}
+_ROTATION_CODES = {0: 'N', 90: 'R', 180: 'I', 270: 'B'}
+_BATCH_LOCK = threading.Lock()
+_PENDING_BATCHES: dict[tuple[str, int], '_PendingBatch'] = {}
+
+
+class _PendingBatch:
+    def __init__(self) -> None:
+        self.payloads: list[bytes] = []
+        self.sending = threading.Event()
+        self.done = threading.Event()
+        self.error: BaseException | None = None
 
 
 def apply_printer_settings(zpl: str, printer: Mapping[str, Any]) -> str:
@@ -11,11 +39,7 @@ def apply_printer_settings(zpl: str, printer: Mapping[str, Any]) -> str:
 
     settings_block = '\n'.join(settings) + '\n'
     if '^XA' in zpl:
-        parts = zpl.split('^XA')
-        rebuilt = parts[0]
-        for part in parts[1:]:
-            rebuilt += '^XA' + settings_block + part
-        return rebuilt
+        return ('^XA' + settings_block).join(zpl.split('^XA'))
     return '^XA' + settings_block + zpl + '\n^XZ\n'
 
 
@@ -35,12 +59,72 @@ def send_raw_zpl(printer: Mapping[str, Any], zpl: str) -> int:
 
     payload = zpl.encode('utf-8')
     timeout_s = max(0.1, timeout_ms / 1000.0)
-    with socket.create_connection((host, port), timeout=timeout_s) as sock:
-        sock.settimeout(timeout_s)
-        sock.sendall(payload)
+    window_s = _batch_window_s()
+    if window_s <= 0:
+        _send_payloads(host, port, timeout_s, (payload,))
+        return len(payload)
+
+    key = (host, port)
+    with _BATCH_LOCK:
+        batch = _PENDING_BATCHES.get(key)
+        is_leader = batch is None
+        if batch is None:
+            batch = _PendingBatch()
+            _PENDING_BATCHES[key] = batch
+        batch.payloads.append(payload)
+
+    if is_leader:
+        time.sleep(window_s)
+        with _BATCH_LOCK:
+            del _PENDING_BATCHES[key]
+        try:
+            _send_payloads(host, port, timeout_s, batch.payloads, on_connected=batch.sending.set)
+        except BaseException as exc:
+            batch.error = exc
+            raise
+        finally:
+            batch.sending.set()
+            batch.done.set()
+        return len(payload)
+
+    batch.sending.wait()
+    if not batch.done.wait(timeout_s * len(batch.payloads) + window_s):
+        raise TimeoutError(f'Timed out waiting for batched print to {host}:{port}')
+    if batch.error is not None:
+        raise batch.error
     return len(payload)
 
 
+def _send_payloads(
+    host: str,
+    port: int,
+    timeout_s: float,
+    payloads: Iterable[bytes],
+    *,
+    on_connected: Callable[[], None] | None = None,
+) -> None:
+    lock_dir = os.getenv('ZPLGRID_PRINT_LOCK_DIR', '').strip()
+    lock = nullcontext()
+    if lock_dir:
+        safe_host = ''.join(ch if ch.isalnum() or ch in '.-' else '_' for ch in host)
+        lock = interprocess_lock(Path(lock_dir) / f'{safe_host}_{port}.lock')
+    with lock:
+        with socket.create_connection((host, port), timeout=timeout_s) as sock:
+            sock.settimeout(timeout_s)
+            if on_connected is not None:
+                on_connected()
+            for payload in payloads:
+                sock.sendall(payload)
+
+
+def _batch_window_s() -> float:
+    raw = os.getenv('ZPLGRID_PRINT_BATCH_WINDOW_MS', '')
+    try:
+        return max(0.0, float(raw) / 1000.0) if raw.strip() else 0.0
+    except ValueError:
+        return 0.0
+
+
 def query_raw_command(printer: Mapping[str, Any], command: str) -> str:
     connection = printer.get('connection') or {}
     protocol = connection.get('protocol')
@@ -120,18 +204,8 @@ def _build_print_settings(printer: Mapping[str, Any]) -> list[str]:
 
 
 def _print_mode_code(mode: str) -> str | None:
-    normalized = mode.strip().lower()
-    mapping = {
-        'tear_off': 'T',
-        'peel_off': 'P',
-        'rewind': 'R',
-        'cutter': 'C',
-        'delayed_cut': 'D',
-        'applicator': 'A',
-    }
-    return mapping.get(normalized)
+    return _PRINT_MODE_CODES.get(mode.strip().lower())
 
 
 def _rotation_code(rotation: int) -> str | None:
-    mapping = {0: 'N', 90: 'R', 180: 'I', 270: 'B'}
-    return mapping.get(rotation)
+    return _ROTATION_CODES.get(rotation)
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Mapping
+from typing import TYPE_CHECKING, Any, Mapping
 
 import yaml
-from jsonschema import Draft202012Validator
+
+if TYPE_CHECKING:
+    from jsonschema import Draft202012Validator
 
 _CONFIG_VERSION = 1
 _CONFIG_DIR = Path('configs')
@@ -19,6 +22,13 @@ def _load_schema() -> dict[str, Any]:
     return json.loads(schema_text)
 
 
+@lru_cache(maxsize=None)
+def _printers_validator() -> Draft202012Validator:
+    from jsonschema import Draft202012Validator
+
+    return Draft202012Validator(_load_schema())
+
+
 def _format_validation_errors(errors: list[Exception]) -> str:
     parts: list[str] = []
     for err in errors:
@@ -34,9 +44,7 @@ def _format_validation_errors(errors: list[Exception]) -> str:
 
 
 def _validate_printers_config(raw: Mapping[str, Any]) -> None:
-    schema = _load_schema()
-    validator = Draft202012Validator(schema)
-    errors = sorted(validator.iter_errors(raw), key=lambda e: list(e.absolute_path))
+    errors = sorted(_printers_validator().iter_errors(raw), key=lambda e: list(e.absolute_path))
     if errors:
         raise ValueError(_format_validation_errors(errors))
 
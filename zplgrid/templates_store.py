@@ -13,6 +13,7 @@ _METADATA_FILENAME = 'metadata.json'
 _TEMPLATE_FILENAME = 'template.json'
 _SAMPLE_DATA_FILENAME = 'sample_data.json'
 _PREVIEW_FILENAME = 'preview.png'
+_SLUG_SEPARATOR_RE = re.compile(r'[^a-z0-9]+')
 
 
 @dataclass(frozen=True)
@@ -48,7 +49,7 @@ def ensure_templates_dir() -> Path:
 
 def _slugify(value: str) -> str:
     normalized = value.strip().lower()
-    normalized = re.sub(r'[^a-z0-9]+', '-', normalized)
+    normalized = _SLUG_SEPARATOR_RE.sub('-', normalized)
     normalized = normalized.strip('-')
     return normalized or 'template'
 
@@ -85,24 +86,11 @@ def list_templates(*, tags: set[str] | None = None) -> list[TemplateEntry]:
         if not metadata_path.exists():
             continue
         metadata = _load_metadata(metadata_path)
-        template_id = str(metadata.get('id') or entry.name)
-        name = str(metadata.get('name') or template_id)
-        tag_list = [str(tag) for tag in metadata.get('tags') or []]
-        variables = [dict(item) for item in (metadata.get('variables') or []) if isinstance(item, Mapping)]
-        preview_target = dict(metadata.get('preview_target') or {})
+        template_entry = _entry_from_metadata(str(metadata.get('id') or entry.name), metadata, entry)
         if tags:
-            if not tags.issubset(set(tag_list)):
+            if not tags.issubset(set(template_entry.tags)):
                 continue
-        entries.append(
-            TemplateEntry(
-                template_id=template_id,
-                name=name,
-                tags=tag_list,
-                variables=variables,
-                preview_target=preview_target,
-                dir_path=entry,
-            )
-        )
+        entries.append(template_entry)
     return entries
 
 
@@ -112,21 +100,29 @@ def load_template_entry(template_id: str) -> TemplateEntry:
     metadata_path = dir_path / _METADATA_FILENAME
     if not metadata_path.exists():
         raise FileNotFoundError(template_id)
-    metadata = _load_metadata(metadata_path)
-    name = str(metadata.get('name') or template_id)
-    tags = [str(tag) for tag in metadata.get('tags') or []]
-    variables = [dict(item) for item in (metadata.get('variables') or []) if isinstance(item, Mapping)]
-    preview_target = dict(metadata.get('preview_target') or {})
+    return _entry_from_metadata(template_id, _load_metadata(metadata_path), dir_path)
+
+
+def _entry_from_metadata(template_id: str, metadata: Mapping[str, Any], dir_path: Path) -> TemplateEntry:
     return TemplateEntry(
         template_id=template_id,
-        name=name,
-        tags=tags,
-        variables=variables,
-        preview_target=preview_target,
+        name=str(metadata.get('name') or template_id),
+        tags=[str(tag) for tag in metadata.get('tags') or []],
+        variables=[dict(item) for item in (metadata.get('variables') or []) if isinstance(item, Mapping)],
+        preview_target=dict(metadata.get('preview_target') or {}),
         dir_path=dir_path,
     )
 
 
+def write_template_preview(entry: TemplateEntry, preview_png: bytes | None) -> None:
+    if preview_png is not None:
+        tmp_path = entry.preview_path.with_name(entry.preview_path.name + '.tmp')
+        tmp_path.write_bytes(preview_png)
+        tmp_path.replace(entry.preview_path)
+    elif entry.preview_path.exists():
+        entry.preview_path.unlink()
+
+
 def save_template_entry(
     *,
     name: str,
@@ -143,25 +139,7 @@ def save_template_entry(
     template_id = _unique_template_id(base_id, existing_ids)
     dir_path = root / template_id
     dir_path.mkdir(parents=True, exist_ok=True)
-
-    metadata = {
-        'id': template_id,
-        'name': name,
-        'tags': tags,
-        'variables': variables,
-        'preview_target': preview_target,
-    }
-    (dir_path / _METADATA_FILENAME).write_text(json.dumps(metadata, indent=2, ensure_ascii=True), encoding='utf-8')
-    (dir_path / _TEMPLATE_FILENAME).write_text(json.dumps(template, indent=2, ensure_ascii=True), encoding='utf-8')
-    (dir_path / _SAMPLE_DATA_FILENAME).write_text(json.dumps(sample_data, indent=2, ensure_ascii=True), encoding='utf-8')
-    if preview_png is not None:
-        (dir_path / _PREVIEW_FILENAME).write_bytes(preview_png)
-    else:
-        preview_path = dir_path / _PREVIEW_FILENAME
-        if preview_path.exists():
-            preview_path.unlink()
-
-    return TemplateEntry(
+    entry = TemplateEntry(
         template_id=template_id,
         name=name,
         tags=tags,
@@ -169,6 +147,8 @@ def save_template_entry(
         preview_target=preview_target,
         dir_path=dir_path,
     )
+    _write_entry_files(entry, template=template, sample_data=sample_data, preview_png=preview_png)
+    return entry
 
 
 def update_template_entry(
@@ -187,25 +167,7 @@ def update_template_entry(
     if not dir_path.exists():
         raise FileNotFoundError(template_id)
     dir_path.mkdir(parents=True, exist_ok=True)
-
-    metadata = {
-        'id': template_id,
-        'name': name,
-        'tags': tags,
-        'variables': variables,
-        'preview_target': preview_target,
-    }
-    (dir_path / _METADATA_FILENAME).write_text(json.dumps(metadata, indent=2, ensure_ascii=True), encoding='utf-8')
-    (dir_path / _TEMPLATE_FILENAME).write_text(json.dumps(template, indent=2, ensure_ascii=True), encoding='utf-8')
-    (dir_path / _SAMPLE_DATA_FILENAME).write_text(json.dumps(sample_data, indent=2, ensure_ascii=True), encoding='utf-8')
-    if preview_png is not None:
-        (dir_path / _PREVIEW_FILENAME).write_bytes(preview_png)
-    else:
-        preview_path = dir_path / _PREVIEW_FILENAME
-        if preview_path.exists():
-            preview_path.unlink()
-
-    return TemplateEntry(
+    entry = TemplateEntry(
         template_id=template_id,
         name=name,
         tags=tags,
@@ -213,3 +175,28 @@ def update_template_entry(
         preview_target=preview_target,
         dir_path=dir_path,
     )
+    _write_entry_files(entry, template=template, sample_data=sample_data, preview_png=preview_png)
+    return entry
+
+
+def _write_entry_files(
+    entry: TemplateEntry,
+    *,
+    template: Mapping[str, Any],
+    sample_data: Mapping[str, Any],
+    preview_png: bytes | None,
+) -> None:
+    metadata = {
+        'id': entry.template_id,
+        'name': entry.name,
+        'tags': entry.tags,
+        'variables': entry.variables,
+        'preview_target': entry.preview_target,
+    }
+    for path, payload in (
+        (entry.metadata_path, metadata),
+        (entry.template_path, template),
+        (entry.sample_data_path, sample_data),
+    ):
+        path.write_text(json.dumps(payload, indent=2, ensure_ascii=True), encoding='utf-8')
+    write_template_preview(entry, preview_png)
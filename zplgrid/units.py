@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import math
+from functools import lru_cache
 
 
 _MM_PER_INCH = 25.4
 
 
+@lru_cache(maxsize=1024)
 def mm_to_dots(mm: float, dpi: int) -> int:
     if mm < 0:
         raise ValueError('mm must be >= 0')
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Mapping
 
 from .exceptions import TemplateIssue
@@ -19,21 +20,29 @@ def validate_template_dict(raw: Mapping[str, Any]) -> list[TemplateIssue]:
     return issues
 
 
-def _validate_against_jsonschema(raw: Mapping[str, Any]) -> list[TemplateIssue]:
+@lru_cache(maxsize=None)
+def _template_validator():
     try:
         import json
         import importlib.resources as resources
         from jsonschema import Draft202012Validator
     except Exception:
-        return []
+        return None
 
     try:
         schema_text = resources.files('zplgrid.schemas').joinpath('zplgrid_template_v1.schema.json').read_text(encoding='utf-8')
         schema = json.loads(schema_text)
     except Exception:
+        return None
+
+    return Draft202012Validator(schema)
+
+
+def _validate_against_jsonschema(raw: Mapping[str, Any]) -> list[TemplateIssue]:
+    validator = _template_validator()
+    if validator is None:
         return []
 
-    validator = Draft202012Validator(schema)
     issues: list[TemplateIssue] = []
     for e in sorted(validator.iter_errors(raw), key=lambda x: list(x.absolute_path)):
         path = '$'
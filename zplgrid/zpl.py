@@ -1,12 +1,23 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import itertools
+import zlib
 from dataclasses import dataclass
-from typing import Iterable, Optional
+from typing import Optional
+
+
+_ACS_MAX_RUN = 419
+_FIELD_DATA_SAFE_BYTES = frozenset(range(0x20, 0x7F)) - {0x5E, 0x7E}
+_ASCII_COMPATIBLE_ENCODINGS = frozenset({'utf-8', 'utf8', 'ascii'})
+_HEX_BYTE_CODES = tuple(f'{b:02X}' for b in range(256))
 
 
 @dataclass(frozen=True)
 class ZplOptions:
     emit_ci28: bool = False
+    graphic_compression: str = 'none'
 
 
 class ZplBuilder:
@@ -66,21 +77,85 @@ class ZplBuilder:
         self._lines.append(f'^GB{width},{height},{thickness},{color},{rounding}')
 
     def graphic_field(self, *, total_bytes: int, bytes_per_row: int, data: str) -> None:
+        compression = self._options.graphic_compression
+        if compression == 'acs':
+            data = compress_graphic_acs(data, bytes_per_row=bytes_per_row)
+        elif compression == 'z64':
+            data = compress_graphic_z64(data)
         self._lines.append(f'^GFA,{total_bytes},{total_bytes},{bytes_per_row},{data}')
 
     def build(self) -> str:
-        return ''.join(line + '\n' for line in self._lines)
+        if not self._lines:
+            return ''
+        return '\n'.join(self._lines) + '\n'
+
+
+def compress_graphic_acs(data: str, *, bytes_per_row: int) -> str:
+    row_chars = bytes_per_row * 2
+    if row_chars <= 0:
+        return data
+
+    out: list[str] = []
+    previous = None
+    for start in range(0, len(data), row_chars):
+        row = data[start:start + row_chars]
+        if row == previous:
+            out.append(':')
+            continue
+        previous = row
+
+        body = row.rstrip('0')
+        tail = ','
+        if len(body) == len(row):
+            body = row.rstrip('F')
+            tail = '!' if len(body) < len(row) else ''
+        out.append(_acs_runs(body) + tail)
+    return ''.join(out)
+
+
+def compress_graphic_z64(data: str) -> str:
+    encoded = base64.b64encode(zlib.compress(bytes.fromhex(data))).decode('ascii')
+    crc = binascii.crc_hqx(encoded.encode('ascii'), 0)
+    return f':Z64:{encoded}:{crc:04X}'
+
+
+def _acs_runs(text: str) -> str:
+    parts: list[str] = []
+    for ch, group in itertools.groupby(text):
+        count = sum(1 for _ in group)
+        while count > 0:
+            run = min(count, _ACS_MAX_RUN)
+            count -= run
+            if run < 3:
+                parts.append(ch * run)
+                continue
+            high, low = divmod(run, 20)
+            if high:
+                parts.append(chr(ord('g') + high - 1))
+            if low:
+                parts.append(chr(ord('G') + low - 1))
+            parts.append(ch)
+    return ''.join(parts)
 
 
 def encode_field_data(text: str, *, hex_indicator: str = '_', encoding: str = 'utf-8') -> tuple[bool, str]:
-    safe_ascii = set(range(0x20, 0x7F))
+    if (
+        text.isascii()
+        and text.isprintable()
+        and '^' not in text
+        and '~' not in text
+        and hex_indicator not in text
+        and encoding.lower() in _ASCII_COMPATIBLE_ENCODINGS
+    ):
+        return False, text
+
     raw = text.encode(encoding, errors='strict')
 
     needs_hex = False
     out_chars: list[str] = []
 
     for b in raw:
-        if b in safe_ascii and b not in (0x5E, 0x7E):
+        if b in _FIELD_DATA_SAFE_BYTES:
             ch = chr(b)
             if ch == hex_indicator:
                 needs_hex = True
@@ -89,6 +164,6 @@ def encode_field_data(text: str, *, hex_indicator: str = '_', encoding: str = 'u
                 out_chars.append(ch)
         else:
             needs_hex = True
-            out_chars.append(f'{hex_indicator}{b:02X}')
+            out_chars.append(hex_indicator + _HEX_BYTE_CODES[b])
 
     return needs_hex, ''.join(out_chars)
@@ -1,15 +1,16 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+import io
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from typing import Literal
-from PIL import Image
+from typing import TYPE_CHECKING, Literal
 
-from .labelary import render_labelary_png
 from .zpl import encode_field_data
 from .zpl_2d import InkMetricsDots
 
+if TYPE_CHECKING:
+    from PIL import Image
+
 
 ZplOrientation = Literal['N', 'R', 'I', 'B']
 
@@ -34,6 +35,8 @@ def _normalize_text(text: str) -> str:
 
 
 def _ink_bbox(img: Image.Image, threshold: int) -> tuple[int, int, int, int] | None:
+    from PIL import Image
+
     if not (0 <= threshold <= 255):
         raise ValueError('threshold must be in [0..255]')
 
@@ -78,28 +81,24 @@ class ZplTextMeasurer:
         if x < 0 or y < 0:
             raise ValueError('x/y must be >= 0')
 
+        ci = '^CI28\n' if self._use_utf8 else ''
+        return f'^XA\n{ci}^LH0,0\n{self._field_zpl(text, font, x, y)}^XZ'
+
+    def _field_zpl(self, text: str, font: ZplFontSpec, x: int, y: int) -> str:
         normalized = _normalize_text(text)
         encoding = 'utf-8' if self._use_utf8 else 'ascii'
         needs_hex, fd = encode_field_data(normalized, hex_indicator='_', encoding=encoding)
-
-        ci = '^CI28\n' if self._use_utf8 else ''
         fh = '^FH\n' if needs_hex else ''
 
         return (
-            '^XA\n'
-            f'{ci}'
-            '^LH0,0\n'
             f'^FO{x},{y}\n'
             f'{font.to_zpl()}\n'
             f'{fh}'
             f'^FD{fd}^FS\n'
-            '^XZ'
         )
 
     def measure(self, text: str, font: ZplFontSpec, x: int = 0, y: int = 0) -> InkMetricsDots:
-        with TemporaryDirectory() as tmp:
-            out_path = Path(tmp) / 'measure.png'
-            return self.measure_and_render(text=text, font=font, out_path=out_path, x=x, y=y)
+        return self._measure(text=text, font=font, out_path=None, x=x, y=y)
 
     def measure_and_render(
         self,
@@ -109,6 +108,75 @@ class ZplTextMeasurer:
         x: int = 0,
         y: int = 0,
     ) -> InkMetricsDots:
+        return self._measure(text=text, font=font, out_path=out_path, x=x, y=y)
+
+    def measure_lines(self, lines: list[str], font: ZplFontSpec) -> list[InkMetricsDots | None]:
+        if font.height is None:
+            raise ValueError('measure_lines requires an explicit font height')
+
+        pitch = 2 * max(1, font.height)
+        per_render = int(_MAX_LABEL_IN * self._dpmm * 25.4) // pitch
+        if per_render < 1:
+            return [None] * len(lines)
+
+        results: list[InkMetricsDots | None] = []
+        for start in range(0, len(lines), per_render):
+            results.extend(self._measure_line_batch(lines[start:start + per_render], font, pitch))
+        return results
+
+    def _measure_line_batch(self, lines: list[str], font: ZplFontSpec, pitch: int) -> list[InkMetricsDots | None]:
+        h_in = min(_MAX_LABEL_IN, max(self._label_h_in, len(lines) * pitch / (self._dpmm * 25.4)))
+
+        from PIL import Image
+
+        from .labelary import render_labelary_png_bytes
+
+        ci = '^CI28\n' if self._use_utf8 else ''
+        fields = ''.join(self._field_zpl(line, font, 0, idx * pitch) for idx, line in enumerate(lines))
+        png = render_labelary_png_bytes(
+            f'^XA\n{ci}^LH0,0\n{fields}^XZ',
+            dpmm=self._dpmm,
+            label_width_in=min(self._label_w_in, _MAX_LABEL_IN),
+            label_height_in=h_in,
+        )
+
+        results: list[InkMetricsDots | None] = []
+        with Image.open(io.BytesIO(png)) as img:
+            img.load()
+            for idx in range(len(lines)):
+                top = idx * pitch
+                band = img.crop((0, top, img.width, min(img.height, top + pitch)))
+                bbox = _ink_bbox(band, threshold=self._threshold)
+                if bbox is None:
+                    results.append(InkMetricsDots(ink_offset_x=0, ink_offset_y=0, ink_width=0, ink_height=0))
+                    continue
+                left, band_top, right, bottom = bbox
+                if right >= img.width - 1 or bottom >= band.height - 1:
+                    results.append(None)
+                    continue
+                results.append(
+                    InkMetricsDots(
+                        ink_offset_x=left,
+                        ink_offset_y=top + band_top,
+                        ink_width=right - left,
+                        ink_height=bottom - band_top,
+                    )
+                )
+        return results
+
+    def _measure(
+        self,
+        *,
+        text: str,
+        font: ZplFontSpec,
+        out_path: Path | None,
+        x: int,
+        y: int,
+    ) -> InkMetricsDots:
+        from PIL import Image
+
+        from .labelary import render_labelary_png_bytes
+
         zpl = self.build_zpl(text=text, font=font, x=x, y=y)
 
         w_in = self._label_w_in
@@ -120,15 +188,17 @@ class ZplTextMeasurer:
         for _ in range(self._max_attempts):
             w_in = min(w_in, _MAX_LABEL_IN)
             h_in = min(h_in, _MAX_LABEL_IN)
-            render_labelary_png(
-                zpl=zpl,
-                out_path=out_path,
+            png = render_labelary_png_bytes(
+                zpl,
                 dpmm=self._dpmm,
                 label_width_in=w_in,
                 label_height_in=h_in,
             )
+            if out_path is not None:
+                out_path.parent.mkdir(parents=True, exist_ok=True)
+                out_path.write_bytes(png)
 
-            with Image.open(out_path) as img:
+            with Image.open(io.BytesIO(png)) as img:
                 bbox = _ink_bbox(img, threshold=self._threshold)
                 last_bbox = bbox
                 last_size = (img.width, img.height)